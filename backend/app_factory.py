@@ -1,12 +1,15 @@
 import os
+import atexit
 from dotenv import load_dotenv
 from flask import Flask
 from flask_cors import CORS
 
 from database import BiasAnalyzer, DatabaseManager
+from ingestion import IngestJobManager
 from neo4j_manager import Neo4jManager
 from routes import register_routes
 from neo4j_routes import neo4j_bp
+from temporal_bias import TemporalBiasStore
 
 
 def create_app():
@@ -35,11 +38,27 @@ def create_app():
     app.config['ARTICLES_FOLDER'] = articles_folder
     app.config['GRAPH_DATA'] = os.path.join(project_root, 'data', 'knowledge_graph.json')
     app.config['MC1_JSON_PATH'] = os.path.join(project_root, 'mc1.json')
+    app.config['TEMPORAL_BIAS_PATH'] = os.getenv(
+        'TEMPORAL_BIAS_PATH', os.path.join(project_root, 'results', 'temporal_bias_analysis.json'))
+
+    # Article ingestion (process pool fan-out, single batched writer)
+    app.config['INGEST_WORKERS'] = int(os.getenv('INGEST_WORKERS', os.cpu_count() or 1))
+    app.config['INGEST_CHUNK_SIZE'] = int(os.getenv('INGEST_CHUNK_SIZE', 8))
+    app.config['INGEST_BATCH_SIZE'] = int(os.getenv('INGEST_BATCH_SIZE', 200))
 
     # Neo4j (supports local and cloud)
     app.config['NEO4J_URI'] = os.getenv('NEO4J_URI', 'neo4j://127.0.0.1:7687')
     app.config['NEO4J_USER'] = os.getenv('NEO4J_USER', 'neo4j')
     app.config['NEO4J_PASSWORD'] = os.getenv('NEO4J_PASSWORD', 'Veda@123')
+    app.config['NEO4J_BATCH_SIZE'] = int(os.getenv('NEO4J_BATCH_SIZE', 1000))
+    app.config['NEO4J_LOAD_WORKERS'] = int(os.getenv('NEO4J_LOAD_WORKERS', 1))
+    app.config['NEO4J_STATS_TTL'] = float(os.getenv('NEO4J_STATS_TTL', 30))
+    app.config['NEO4J_QUERY_TIMEOUT'] = float(os.getenv('NEO4J_QUERY_TIMEOUT', 30))
+    app.config['NEO4J_STREAM_ROW_LIMIT'] = int(os.getenv('NEO4J_STREAM_ROW_LIMIT', 100000))
+    app.config['NEO4J_QUERY_CACHE_BYTES'] = int(os.getenv('NEO4J_QUERY_CACHE_BYTES', 64 * 1024 * 1024))
+    app.config['NEO4J_QUERY_CACHE_TTL'] = float(os.getenv('NEO4J_QUERY_CACHE_TTL', 60))
+    app.config['NEO4J_NEIGHBORHOOD_MAX_NODES'] = int(os.getenv('NEO4J_NEIGHBORHOOD_MAX_NODES', 2000))
+    app.config['NEO4J_OFFLINE_RETRY'] = float(os.getenv('NEO4J_OFFLINE_RETRY', 10))
     
     # Debug: Print loaded configuration
     print(f"Neo4j Configuration:")
@@ -56,7 +75,17 @@ def create_app():
         neo4j_manager = Neo4jManager(
             app.config['NEO4J_URI'],
             app.config['NEO4J_USER'],
-            app.config['NEO4J_PASSWORD']
+            app.config['NEO4J_PASSWORD'],
+            batch_size=app.config['NEO4J_BATCH_SIZE'],
+            load_workers=app.config['NEO4J_LOAD_WORKERS'],
+            stats_ttl=app.config['NEO4J_STATS_TTL'],
+            query_timeout=app.config['NEO4J_QUERY_TIMEOUT'],
+            stream_row_limit=app.config['NEO4J_STREAM_ROW_LIMIT'],
+            query_cache_bytes=app.config['NEO4J_QUERY_CACHE_BYTES'],
+            query_cache_ttl=app.config['NEO4J_QUERY_CACHE_TTL'],
+            mc1_path=app.config['MC1_JSON_PATH'],
+            neighborhood_max_nodes=app.config['NEO4J_NEIGHBORHOOD_MAX_NODES'],
+            offline_retry=app.config['NEO4J_OFFLINE_RETRY']
         )
     except Exception as e:
         print(f"Failed to initialize Neo4j manager: {e}")
@@ -80,6 +109,22 @@ def create_app():
 
     # Store neo4j_manager in app context for blueprint access
     app.neo4j_manager = neo4j_manager
+    app.db_manager = db_manager
+    app.ingest_jobs = IngestJobManager(db_manager, bias_analyzer)
+    app.temporal_bias = TemporalBiasStore(
+        app.config['MC1_JSON_PATH'],
+        app.config['TEMPORAL_BIAS_PATH'],
+        load_engine=neo4j_manager.shared_graph_engine if neo4j_manager else None
+    )
+
+    # Release pooled SQLite connections and the Neo4j driver on shutdown
+    def _shutdown():
+        db_manager.close()
+        if neo4j_manager:
+            neo4j_manager.close()
+
+    app.shutdown = _shutdown
+    atexit.register(_shutdown)
     
     # Routes
     register_routes(app, bias_analyzer, db_manager, neo4j_manager)
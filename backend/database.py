@@ -1,6 +1,8 @@
 import os
 import json
 import sqlite3
+import threading
+import weakref
 from datetime import datetime
 from collections import defaultdict
 import re
@@ -9,6 +11,42 @@ import pandas as pd
 import numpy as np
 from textblob import TextBlob
 
+from diversity import entropy_of, shannon_entropy
+
+# Applied to every connection. WAL lets dashboard reads run alongside ingest
+# writes; synchronous=NORMAL is durable under WAL and avoids an fsync per commit.
+SQLITE_PRAGMAS = (
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -64000),      # ~64 MB page cache
+    ('mmap_size', 268435456),    # 256 MB memory-mapped reads
+    ('temp_store', 'MEMORY'),
+)
+
+# Per-connection prepared statement cache (sqlite3 default is 128)
+SQLITE_STATEMENT_CACHE = 256
+
+# Column order of the entity x sentiment count matrix
+SENTIMENT_LABELS = ('positive', 'negative', 'neutral')
+
+# Upsert rather than INSERT OR REPLACE: the article id stays stable and the
+# UPDATE trigger keeps article_entities in sync (REPLACE would skip triggers)
+INSERT_ARTICLE_SQL = '''
+    INSERT INTO articles (filename, content, sentiment, entities)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(filename) DO UPDATE SET
+        content = excluded.content,
+        sentiment = excluded.sentiment,
+        entities = excluded.entities
+'''
+UPSERT_MANIFEST_SQL = '''
+    INSERT OR REPLACE INTO ingest_manifest (filename, size, mtime_ns, content_hash)
+    VALUES (?, ?, ?, ?)
+'''
+INSERT_BIAS_ANALYSIS_SQL = '''
+    INSERT INTO bias_analysis (entity, source_type, bias_type, bias_score, evidence)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
 
 class BiasAnalyzer:
     def __init__(self):
@@ -28,12 +66,7 @@ class BiasAnalyzer:
     
     def calculate_entropy(self, data_list):
         """Calculate information entropy for bias detection"""
-        if not data_list:
-            return 0
-        value_counts = pd.Series(data_list).value_counts()
-        probabilities = value_counts / len(data_list)
-        entropy = -sum(probabilities * np.log2(probabilities))
-        return entropy
+        return entropy_of(data_list)
     
     def extract_entities(self, text):
         """Simple entity extraction using regex patterns"""
@@ -48,14 +81,231 @@ class BiasAnalyzer:
         return list(set(entities))
 
 
+# article_entities is derived from articles.entities by triggers, so every
+# write path (single insert, batch upsert, purge) keeps it in sync.
+ARTICLE_ENTITY_TRIGGERS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS articles_entities_insert AFTER INSERT ON articles
+    BEGIN
+        INSERT INTO article_entities (article_id, entity, sentiment)
+        SELECT DISTINCT NEW.id, value, NEW.sentiment FROM json_each(COALESCE(NEW.entities, '[]'));
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS articles_entities_update AFTER UPDATE OF sentiment, entities ON articles
+    BEGIN
+        DELETE FROM article_entities WHERE article_id = OLD.id;
+        INSERT INTO article_entities (article_id, entity, sentiment)
+        SELECT DISTINCT NEW.id, value, NEW.sentiment FROM json_each(COALESCE(NEW.entities, '[]'));
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS articles_entities_delete AFTER DELETE ON articles
+    BEGIN
+        DELETE FROM article_entities WHERE article_id = OLD.id;
+    END
+    ''',
+)
+
+
+# entity_sentiment_stats is a materialized per-entity count maintained from
+# article_entities, so the sentiment endpoints read O(entities) rows.
+ENTITY_STATS_TRIGGERS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS article_entities_stats_insert AFTER INSERT ON article_entities
+    BEGIN
+        INSERT INTO entity_sentiment_stats (entity, positive, negative, neutral, total)
+        VALUES (NEW.entity, NEW.sentiment IS 'positive', NEW.sentiment IS 'negative', NEW.sentiment IS 'neutral', 1)
+        ON CONFLICT(entity) DO UPDATE SET
+            positive = positive + excluded.positive,
+            negative = negative + excluded.negative,
+            neutral = neutral + excluded.neutral,
+            total = total + 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS article_entities_stats_delete AFTER DELETE ON article_entities
+    BEGIN
+        UPDATE entity_sentiment_stats SET
+            positive = positive - (OLD.sentiment IS 'positive'),
+            negative = negative - (OLD.sentiment IS 'negative'),
+            neutral = neutral - (OLD.sentiment IS 'neutral'),
+            total = total - 1
+        WHERE entity = OLD.entity;
+        DELETE FROM entity_sentiment_stats WHERE entity = OLD.entity AND total <= 0;
+    END
+    ''',
+)
+
+
+def _migrate_article_entities(cursor):
+    """Backfill article_entities from the JSON column of existing articles"""
+    cursor.execute("DELETE FROM article_entities")
+    cursor.execute('''
+        INSERT INTO article_entities (article_id, entity, sentiment)
+        SELECT DISTINCT a.id, e.value, a.sentiment
+        FROM articles a, json_each(COALESCE(a.entities, '[]')) e
+    ''')
+
+
+def _migrate_entity_sentiment_stats(cursor):
+    """Rebuild entity_sentiment_stats from article_entities"""
+    cursor.execute("DELETE FROM entity_sentiment_stats")
+    cursor.execute('''
+        INSERT INTO entity_sentiment_stats (entity, positive, negative, neutral, total)
+        SELECT entity,
+               SUM(sentiment IS 'positive'),
+               SUM(sentiment IS 'negative'),
+               SUM(sentiment IS 'neutral'),
+               COUNT(*)
+        FROM article_entities
+        GROUP BY entity
+    ''')
+
+
+# Data migrations, applied in order and tracked with PRAGMA user_version
+MIGRATIONS = (
+    _migrate_article_entities,
+    _migrate_entity_sentiment_stats,
+)
+
+
+class _ThreadConnection:
+    """Per-thread holder; its finalizer closes the connection when the thread's locals are freed"""
+
+    __slots__ = ('conn', '__weakref__')
+
+    def __init__(self, conn):
+        self.conn = conn
+
+
+class ConnectionManager:
+    """Hands out one reusable SQLite connection per thread.
+
+    Connections keep their prepared statement cache across requests, so hot
+    read queries are parsed once per thread instead of once per call.
+    A connection is closed as soon as its thread exits (its thread-local
+    holder is finalized), and ``close_all`` releases the rest at shutdown.
+    """
+
+    def __init__(self, db_path, cached_statements=SQLITE_STATEMENT_CACHE):
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = set()
+
+    def get(self):
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            conn = sqlite3.connect(self.db_path, cached_statements=self.cached_statements,
+                                   check_same_thread=False)
+            for name, value in SQLITE_PRAGMAS:
+                conn.execute(f"PRAGMA {name} = {value}")
+            with self._lock:
+                self._connections.add(conn)
+            holder = self._local.holder = _ThreadConnection(conn)
+            weakref.finalize(holder, self._release, conn)
+        return holder.conn
+
+    def _release(self, conn):
+        with self._lock:
+            if conn not in self._connections:
+                return
+            self._connections.discard(conn)
+        try:
+            conn.close()
+        except Exception as e:
+            print(f"Error closing database connection: {e}")
+
+    def close_all(self):
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                print(f"Error closing database connection: {e}")
+        self._local = threading.local()
+
+
+_connection_managers = {}
+_connection_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_path):
+    """Return the process-wide ConnectionManager for ``db_path``"""
+    with _connection_managers_lock:
+        manager = _connection_managers.get(db_path)
+        if manager is None:
+            manager = _connection_managers[db_path] = ConnectionManager(db_path)
+        return manager
+
+
+class BulkWriter:
+    """Buffers DatabaseManager writes and flushes them with executemany.
+
+    Exposes the same ``insert_article`` / ``insert_bias_analysis`` signatures
+    as ``DatabaseManager`` so a caller can swap ``db_manager`` for the writer
+    returned by ``db_manager.bulk_writer()`` without other changes.
+    """
+
+    def __init__(self, db_manager, batch_size=500):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.articles = []
+        self.bias_rows = []
+        self.written = 0
+
+    def insert_article(self, filename, content, sentiment, entities):
+        self.articles.append({'filename': filename, 'content': content, 'sentiment': sentiment, 'entities': entities})
+        if len(self.articles) >= self.batch_size:
+            self.flush()
+
+    def insert_bias_analysis(self, entity, source_type, bias_type, bias_score, evidence):
+        self.bias_rows.append((entity, source_type, bias_type, bias_score, evidence))
+        if len(self.bias_rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.articles:
+            self.written += self.db_manager.insert_articles(self.articles)
+            self.articles = []
+        if self.bias_rows:
+            self.written += self.db_manager.insert_bias_analyses(self.bias_rows)
+            self.bias_rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+
 class DatabaseManager:
     def __init__(self, db_path):
         self.db_path = db_path
+        self.connections = get_connection_manager(db_path)
         self.init_database()
-    
+
+    def _connect(self):
+        return self.connections.get()
+
+    def close(self):
+        """Close every pooled connection; called on app shutdown"""
+        self.connections.close_all()
+
+    def bulk_writer(self, batch_size=500):
+        """Return a BulkWriter; use as ``with db_manager.bulk_writer() as writer:``"""
+        return BulkWriter(self, batch_size)
+
     def init_database(self):
         """Initialize database tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
+        # journal_mode is persistent, so setting it once per database is enough
+        conn.execute("PRAGMA journal_mode = WAL")
         cursor = conn.cursor()
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS articles (
@@ -98,105 +348,202 @@ class DatabaseManager:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ingest_manifest (
+                filename TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                content_hash TEXT,
+                ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS article_entities (
+                article_id INTEGER NOT NULL,
+                entity TEXT NOT NULL,
+                sentiment TEXT
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_article_entities_entity ON article_entities (entity, sentiment)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_article_entities_article ON article_entities (article_id)")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS entity_sentiment_stats (
+                entity TEXT PRIMARY KEY,
+                positive INTEGER NOT NULL DEFAULT 0,
+                negative INTEGER NOT NULL DEFAULT 0,
+                neutral INTEGER NOT NULL DEFAULT 0,
+                total INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        for trigger in ARTICLE_ENTITY_TRIGGERS + ENTITY_STATS_TRIGGERS:
+            cursor.execute(trigger)
         conn.commit()
-        conn.close()
+        self.run_migrations()
+
+    def run_migrations(self):
+        """Apply pending data migrations, each in its own transaction"""
+        conn = self._connect()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for index, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            cursor = conn.cursor()
+            try:
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {index}")
+                conn.commit()
+                print(f"Applied database migration {index}: {migration.__name__}")
+            except Exception as e:
+                print(f"Database migration {index} failed: {e}")
+                conn.rollback()
+                break
     
     def insert_article(self, filename, content, sentiment, entities):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO articles (filename, content, sentiment, entities)
-                VALUES (?, ?, ?, ?)
-            ''', (filename, content, sentiment, json.dumps(entities)))
+            cursor.execute(INSERT_ARTICLE_SQL, (filename, content, sentiment, json.dumps(entities)))
             conn.commit()
         except Exception as e:
             print(f"Database error inserting {filename}: {e}")
             conn.rollback()
-        finally:
-            conn.close()
-    
+
+    def insert_articles(self, articles, manifest=(), removed=()):
+        """Insert a batch of article dicts in one transaction; returns rows written, False on failure.
+
+        ``manifest`` rows ``(filename, size, mtime_ns, content_hash)`` are
+        upserted in the same transaction so the manifest never gets ahead of
+        the articles table. Articles for the ``removed`` filenames (files that
+        no longer yield an article) are deleted in that transaction too.
+        """
+        rows = [(a['filename'], a['content'], a['sentiment'], json.dumps(a['entities'])) for a in articles]
+        manifest = list(manifest)
+        removed = [(f,) for f in removed]
+        if not rows and not manifest and not removed:
+            return 0
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany("DELETE FROM articles WHERE filename = ?", removed)
+            cursor.executemany(INSERT_ARTICLE_SQL, rows)
+            cursor.executemany(UPSERT_MANIFEST_SQL, manifest)
+            conn.commit()
+            return len(rows)
+        except Exception as e:
+            print(f"Database error inserting batch of {len(rows)} articles: {e}")
+            conn.rollback()
+            return False
+
+    def get_ingest_manifest(self):
+        """Return {filename: (size, mtime_ns, content_hash)} without touching article bodies"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT filename, size, mtime_ns, content_hash FROM ingest_manifest")
+        manifest = {row[0]: (row[1], row[2], row[3]) for row in cursor.fetchall()}
+        return manifest
+
+    def purge_articles(self, filenames):
+        """Delete articles (and their manifest entries) whose files were removed"""
+        params = [(f,) for f in filenames]
+        if not params:
+            return 0
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany("DELETE FROM articles WHERE filename = ?", params)
+            cursor.executemany("DELETE FROM ingest_manifest WHERE filename = ?", params)
+            conn.commit()
+            return len(params)
+        except Exception as e:
+            print(f"Database error purging {len(params)} articles: {e}")
+            conn.rollback()
+            return 0
+
     def get_article_count(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM articles")
         count = cursor.fetchone()[0]
-        conn.close()
         return count
     
     def get_articles(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         df = pd.read_sql_query("SELECT * FROM articles", conn)
-        conn.close()
         return df
     
     def insert_bias_analysis(self, entity, source_type, bias_type, bias_score, evidence):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO bias_analysis (entity, source_type, bias_type, bias_score, evidence)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (entity, source_type, bias_type, bias_score, evidence))
-        conn.commit()
-        conn.close()
+        try:
+            cursor.execute(INSERT_BIAS_ANALYSIS_SQL, (entity, source_type, bias_type, bias_score, evidence))
+            conn.commit()
+        except Exception:
+            # The pooled connection must not keep the failed transaction's write lock
+            conn.rollback()
+            raise
+
+    def insert_bias_analyses(self, rows):
+        """Insert ``(entity, source_type, bias_type, bias_score, evidence)`` rows in one transaction"""
+        rows = list(rows)
+        if not rows:
+            return 0
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(INSERT_BIAS_ANALYSIS_SQL, rows)
+            conn.commit()
+            return len(rows)
+        except Exception as e:
+            print(f"Database error inserting batch of {len(rows)} bias rows: {e}")
+            conn.rollback()
+            return 0
     
+    def get_entity_sentiment_counts(self):
+        """Return (entity, positive, negative, neutral, total) rows from the materialized stats"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT entity, positive, negative, neutral, total FROM entity_sentiment_stats")
+        return cursor.fetchall()
+
+    def get_entity_sentiment_matrix(self):
+        """Return ``(entities, counts)`` where ``counts`` is an entities x SENTIMENT_LABELS int array"""
+        rows = self.get_entity_sentiment_counts()
+        entities = [row[0] for row in rows]
+        counts = np.array([row[1:4] for row in rows], dtype=np.int64).reshape(len(rows), len(SENTIMENT_LABELS))
+        return entities, counts
+
+    @staticmethod
+    def sentiment_distributions(counts):
+        """Turn each count-matrix row into {sentiment: count}, largest first, zeros dropped"""
+        order = np.argsort(-counts, axis=1, kind='stable')
+        return [
+            {SENTIMENT_LABELS[j]: row[j] for j in row_order if row[j]}
+            for row, row_order in zip(counts.tolist(), order.tolist())
+        ]
+
     def get_sentiment_analysis(self):
-        conn = sqlite3.connect(self.db_path)
-        articles_df = pd.read_sql_query("SELECT * FROM articles", conn)
-        conn.close()
-        if articles_df.empty:
-            return pd.DataFrame()
-        entity_sentiment = {}
-        for _, article in articles_df.iterrows():
-            entities = json.loads(article['entities']) if article['entities'] else []
-            sentiment = article['sentiment']
-            for entity in entities:
-                if entity not in entity_sentiment:
-                    entity_sentiment[entity] = {'positive': 0, 'negative': 0, 'neutral': 0, 'total': 0}
-                entity_sentiment[entity][sentiment] += 1
-                entity_sentiment[entity]['total'] += 1
         sentiment_data = []
-        for entity, counts in entity_sentiment.items():
-            if counts['total'] > 0:
-                sentiment_data.append({
-                    'entity': entity,
-                    'positive': counts['positive'],
-                    'negative': counts['negative'],
-                    'neutral': counts['neutral'],
-                    'total': counts['total'],
-                    'positive_ratio': counts['positive'] / counts['total'],
-                    'negative_ratio': counts['negative'] / counts['total']
-                })
+        for entity, positive, negative, neutral, total in self.get_entity_sentiment_counts():
+            sentiment_data.append({
+                'entity': entity,
+                'positive': positive,
+                'negative': negative,
+                'neutral': neutral,
+                'total': total,
+                'positive_ratio': positive / total,
+                'negative_ratio': negative / total
+            })
         return pd.DataFrame(sentiment_data)
     
     def get_entropy_analysis(self):
-        conn = sqlite3.connect(self.db_path)
-        articles_df = pd.read_sql_query("SELECT * FROM articles", conn)
-        conn.close()
-        if articles_df.empty:
-            return pd.DataFrame()
-        entity_sentiments = {}
-        for _, article in articles_df.iterrows():
-            entities = json.loads(article['entities']) if article['entities'] else []
-            sentiment = article['sentiment']
-            for entity in entities:
-                if entity not in entity_sentiments:
-                    entity_sentiments[entity] = []
-                entity_sentiments[entity].append(sentiment)
+        entities, counts = self.get_entity_sentiment_matrix()
+        totals = counts.sum(axis=1)
+        entropies = shannon_entropy(counts)
+        distributions = self.sentiment_distributions(counts)
         entropy_data = []
-        bias_analyzer = BiasAnalyzer()
-        for entity, sentiments in entity_sentiments.items():
-            if len(sentiments) > 1:
-                entropy = bias_analyzer.calculate_entropy(sentiments)
-                sentiment_dist = {}
-                for s in sentiments:
-                    sentiment_dist[s] = sentiment_dist.get(s, 0) + 1
-                entropy_data.append({
-                    'entity': entity,
-                    'entropy': entropy,
-                    'article_count': len(sentiments),
-                    'sentiment_distribution': sentiment_dist
-                })
+        for i in np.flatnonzero(totals > 1):
+            entropy_data.append({
+                'entity': entities[i],
+                'entropy': float(entropies[i]),
+                'article_count': int(totals[i]),
+                'sentiment_distribution': distributions[i]
+            })
         return pd.DataFrame(entropy_data)
-
-
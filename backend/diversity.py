@@ -0,0 +1,102 @@
+"""
+Vectorized diversity metrics shared by the bias detectors, routes and notebooks.
+
+Every metric takes a 2-D count matrix with one row per group (entity, analyst,
+algorithm, ...) and one column per category (sentiment, event type, ...), and
+scores all rows in a single NumPy pass.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def count_matrix(groups, categories, category_labels=None):
+    """Build a (groups x categories) count matrix from parallel label sequences.
+
+    Groups keep first-appearance order. When ``category_labels`` is given the
+    columns follow it and unknown categories are dropped; otherwise columns are
+    the categories in first-appearance order. Pairs with a missing (None/NaN)
+    group or category are not counted.
+    Returns ``(group_labels, category_labels, counts)``.
+    """
+    group_codes, group_labels = pd.factorize(pd.Series(groups, dtype=object))
+    if category_labels is None:
+        category_codes, category_labels = pd.factorize(pd.Series(categories, dtype=object))
+    else:
+        category_codes = pd.Index(category_labels).get_indexer(pd.Series(categories, dtype=object))
+    # factorize/get_indexer code missing and unknown values as -1
+    known = (group_codes >= 0) & (category_codes >= 0)
+    group_codes, category_codes = group_codes[known], category_codes[known]
+    n_groups, n_categories = len(group_labels), len(category_labels)
+    counts = np.bincount(
+        group_codes * n_categories + category_codes, minlength=n_groups * n_categories
+    ).reshape(n_groups, n_categories)
+    return list(group_labels), list(category_labels), counts
+
+
+def counters_to_matrix(counters):
+    """Stack a sequence of {category: count} mappings into ``(category_labels, counts)``"""
+    category_labels = list(dict.fromkeys(k for counter in counters for k in counter))
+    column = {label: i for i, label in enumerate(category_labels)}
+    counts = np.zeros((len(counters), len(category_labels)), dtype=np.int64)
+    for row, counter in enumerate(counters):
+        for label, count in counter.items():
+            counts[row, column[label]] = count
+    return category_labels, counts
+
+
+def probabilities(counts):
+    """Row-normalize a count matrix; all-zero rows stay zero"""
+    counts = np.asarray(counts, dtype=float)
+    totals = counts.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(totals > 0, counts / totals, 0.0)
+
+
+def richness(counts):
+    """Number of categories observed in each row"""
+    return (np.asarray(counts) > 0).sum(axis=1)
+
+
+def shannon_entropy(counts):
+    """Shannon entropy in bits for every row"""
+    p = probabilities(counts)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms = np.where(p > 0, p * np.log2(p), 0.0)
+    return -terms.sum(axis=1)
+
+
+def pielou_evenness(counts, entropy=None):
+    """Pielou's J' = H / log2(S); 0 for rows with fewer than two categories"""
+    entropy = shannon_entropy(counts) if entropy is None else entropy
+    max_entropy = np.log2(np.maximum(richness(counts), 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(max_entropy > 0, entropy / max_entropy, 0.0)
+
+
+def gini_simpson(counts):
+    """Gini-Simpson diversity 1 - sum(p^2); 0 for empty rows"""
+    counts = np.asarray(counts)
+    p = probabilities(counts)
+    return np.where(counts.sum(axis=1) > 0, 1.0 - (p ** 2).sum(axis=1), 0.0)
+
+
+def diversity_metrics(counts):
+    """All metrics for a count matrix as a dict of 1-D arrays"""
+    counts = np.asarray(counts)
+    entropy = shannon_entropy(counts)
+    return {
+        'total': counts.sum(axis=1),
+        'richness': richness(counts),
+        'shannon': entropy,
+        'evenness_pielou': pielou_evenness(counts, entropy),
+        'simpson_diversity': gini_simpson(counts),
+    }
+
+
+def entropy_of(values):
+    """Shannon entropy of a single sequence of labels"""
+    if len(values) == 0:
+        return 0.0
+    _, _, counts = count_matrix(np.zeros(len(values), dtype=np.int64), values)
+    return float(shannon_entropy(counts)[0])
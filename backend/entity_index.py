@@ -0,0 +1,159 @@
+"""
+In-process entity search over MC1 nodes, used when Neo4j is unavailable.
+
+Every node is indexed by a normalized key (the lower-cased word tokens of its
+id, plus its name when the dump has one). Lookups combine three cheap structures:
+
+* a sorted key array for whole-key prefix matches (``bisect``),
+* a sorted token array for word-prefix matches,
+* trigram postings (sorted NumPy arrays) for substring and fuzzy matches:
+  candidates come from the rarest trigrams within a posting budget, then
+  exact similarity is computed for those candidates only.
+
+Results are ranked exact > prefix > word prefix > substring > fuzzy, with
+trigram similarity breaking ties inside a tier.
+"""
+
+import re
+from bisect import bisect_left
+
+import numpy as np
+
+from mc1_reader import iter_nodes
+
+_TOKENS = re.compile(r'\w+')
+
+# Candidate caps keep worst-case lookups bounded on very large graphs
+PREFIX_CANDIDATES = 200
+TRIGRAM_CANDIDATES = 2000
+POSTING_BUDGET = 1000000
+MIN_SIMILARITY = 0.3
+
+
+def search_tokens(text):
+    return _TOKENS.findall(text.lower())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def lucene_query(text):
+    """Full-text query for type-ahead input: every token as exact, prefix or fuzzy term"""
+    clauses = []
+    for token in search_tokens(text):
+        terms = [f"{token}^3", f"{token}*^2"]
+        if len(token) >= 4:
+            terms.append(f"{token}~1")
+        clauses.append('(' + ' OR '.join(terms) + ')')
+    return ' AND '.join(clauses)
+
+
+class EntityIndex:
+    """Prefix, token and trigram index over a list of entity dicts"""
+
+    def __init__(self, entities):
+        self.entities = entities
+        self.keys = []
+        postings = {}
+        tokens = []
+        gram_counts = []
+        for i, entity in enumerate(entities):
+            key = ' '.join(search_tokens(str(entity['id'])))
+            name = entity.get('name')
+            if name:
+                name_key = ' '.join(search_tokens(str(name)))
+                if name_key != key:
+                    key = f"{key} {name_key}"
+            self.keys.append(key)
+            tokens.extend((token, i) for token in set(key.split()))
+            grams = trigrams(key)
+            gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self._sorted_keys = [self.keys[i] for i in order]
+        self._sorted_key_ids = np.asarray(order, dtype=np.int64)
+        tokens.sort()
+        self._sorted_tokens = [token for token, _ in tokens]
+        self._sorted_token_ids = np.asarray([i for _, i in tokens], dtype=np.int64)
+        self._postings = {gram: np.asarray(ids, dtype=np.int64) for gram, ids in postings.items()}
+        self._gram_counts = np.asarray(gram_counts, dtype=np.int64)
+
+    @classmethod
+    def from_mc1(cls, mc1_file_path):
+        entities = [
+            {'id': node['id'], 'type': node.get('type', 'Unknown'), 'country': node.get('country'),
+             **({'name': node['name']} if node.get('name') else {})}
+            for node in iter_nodes(mc1_file_path)
+        ]
+        return cls(entities)
+
+    def __len__(self):
+        return len(self.entities)
+
+    @staticmethod
+    def _prefix_range(sorted_values, prefix, cap):
+        start = bisect_left(sorted_values, prefix)
+        end = start
+        while end < len(sorted_values) and end - start < cap and sorted_values[end].startswith(prefix):
+            end += 1
+        return start, end
+
+    def _trigram_matches(self, text, offer):
+        query_grams = trigrams(text)
+        lists = sorted(
+            (self._postings[gram] for gram in query_grams if gram in self._postings), key=len
+        )
+        if not lists:
+            return
+        # Rarest trigrams first, within a posting budget so huge lists never dominate
+        selected, budget = [], 0
+        for posting in lists:
+            if selected and budget + len(posting) > POSTING_BUDGET:
+                break
+            selected.append(posting)
+            budget += len(posting)
+        shared = np.bincount(np.concatenate(selected), minlength=len(self.keys))
+        candidates = np.flatnonzero(shared >= max(1, int(len(selected) * MIN_SIMILARITY)))
+        if len(candidates) > TRIGRAM_CANDIDATES:
+            candidates = candidates[np.argpartition(-shared[candidates], TRIGRAM_CANDIDATES)[:TRIGRAM_CANDIDATES]]
+        # Exact shared-trigram counts over every query trigram, for the candidates only
+        shared = np.zeros(len(candidates), dtype=np.int64)
+        for posting in lists:
+            positions = np.searchsorted(posting, candidates).clip(max=len(posting) - 1)
+            shared += posting[positions] == candidates
+        similarity = shared / (len(query_grams) + self._gram_counts[candidates] - shared)
+        for i, sim in zip(candidates.tolist(), similarity.tolist()):
+            if text in self.keys[i]:
+                offer(i, 1.0 + sim)
+            elif sim >= MIN_SIMILARITY:
+                offer(i, sim)
+
+    def search(self, query, limit=20):
+        """Ranked entities for ``query``; each result carries a ``score``"""
+        text = ' '.join(search_tokens(query))
+        if not text:
+            return []
+        scores = {}
+
+        def offer(i, score):
+            if score > scores.get(i, 0.0):
+                scores[i] = score
+
+        start, end = self._prefix_range(self._sorted_keys, text, PREFIX_CANDIDATES)
+        for i in self._sorted_key_ids[start:end].tolist():
+            offer(i, 4.0 if self.keys[i] == text else 3.0)
+
+        query_tokens = text.split()
+        start, end = self._prefix_range(self._sorted_tokens, query_tokens[-1], PREFIX_CANDIDATES)
+        for i in self._sorted_token_ids[start:end].tolist():
+            if all(token in self.keys[i] for token in query_tokens[:-1]):
+                offer(i, 2.0)
+
+        if len(text) >= 3:
+            self._trigram_matches(text, offer)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], len(self.keys[item[0]]), self.keys[item[0]]))
+        return [dict(self.entities[i], score=round(score, 4)) for i, score in ranked[:limit]]
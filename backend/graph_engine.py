@@ -0,0 +1,372 @@
+"""
+In-process MC1 graph engine, used when Neo4j is unavailable.
+
+The graph is held in NumPy arrays rather than Python objects:
+
+* node ids are interned to dense ``int32`` indices (``ids`` / ``index``),
+* node and link properties are typed code columns (``int32`` codes into a
+  per-column value table, ``-1`` for missing), with link dates parsed once per
+  distinct value into ``datetime64[D]``,
+* adjacency is CSR in both directions: ``out_offsets[i]:out_offsets[i + 1]``
+  slices ``out_edges`` to the link indices leaving node ``i`` (``in_*`` alike),
+* links are also kept in date order (``date_order`` / ``sorted_dates``), so a
+  time window is two binary searches.
+
+Traversals are array slices, so a node's neighbourhood costs a few
+microseconds regardless of graph size. Results use the same shapes as the
+``Neo4jManager`` methods they stand in for.
+"""
+
+from array import array
+
+import numpy as np
+
+from entity_index import EntityIndex
+from mc1_model import node_group, node_label, relationship_type, stratified_quotas, temporal_buckets
+from mc1_reader import iter_links, iter_nodes
+
+
+class Interner:
+    """Maps values to dense integer codes; ``None`` maps to -1"""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def __call__(self, value):
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.values)
+
+
+class Column:
+    """Typed property column: ``int32`` codes into a table of distinct values"""
+
+    def __init__(self, codes, interner):
+        self.codes = np.frombuffer(codes, dtype=np.int32)
+        self.values = interner.values
+        self._lookup = interner.codes
+
+    def __getitem__(self, i):
+        code = self.codes[i]
+        return self.values[code] if code >= 0 else None
+
+    def code(self, value):
+        """Code of ``value``, or -1 when no row has it"""
+        return self._lookup.get(value, -1)
+
+    def take(self, rows):
+        """Values for an index array of rows, as a list"""
+        values = self.values
+        return [values[code] if code >= 0 else None for code in self.codes[rows].tolist()]
+
+
+def _csr(keys, n):
+    """Offsets and link order grouping link indices by ``keys``"""
+    order = np.argsort(keys, kind='stable').astype(np.int32)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n), out=offsets[1:])
+    return offsets, order
+
+
+def _dates(values):
+    days = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[D]')
+    for i, value in enumerate(values):
+        try:
+            days[i] = np.datetime64(str(value)[:10], 'D')
+        except ValueError:
+            pass
+    return days
+
+
+class GraphEngine:
+    NODE_COLUMNS = ('type', 'country', 'name')
+    LINK_COLUMNS = ('type', 'algorithm', 'date_added', 'last_edited_by', 'raw_source')
+
+    def __init__(self, nodes, links):
+        """Build from iterables of MC1 node and link dicts (read once, in order)"""
+        self.index = {}
+        self.ids = []
+        interners = {column: Interner() for column in self.NODE_COLUMNS}
+        codes = {column: array('i') for column in self.NODE_COLUMNS}
+        for node in nodes:
+            node_id = node['id']
+            if node_id in self.index:
+                continue
+            self.index[node_id] = len(self.ids)
+            self.ids.append(node_id)
+            codes['type'].append(interners['type'](node.get('type', 'Unknown')))
+            codes['country'].append(interners['country'](node.get('country')))
+            codes['name'].append(interners['name'](node.get('name')))
+        self.node_columns = {
+            column: Column(codes[column], interners[column]) for column in self.NODE_COLUMNS
+        }
+
+        link_interners = {column: Interner() for column in self.LINK_COLUMNS}
+        link_codes = {column: array('i') for column in self.LINK_COLUMNS}
+        source, target, keys = array('i'), array('i'), array('i')
+        for link in links:
+            # Links to unknown nodes are dropped, as the Neo4j loader's MATCH does
+            s, t = self.index.get(link['source']), self.index.get(link['target'])
+            if s is None or t is None:
+                continue
+            source.append(s)
+            target.append(t)
+            keys.append(link.get('key') or 0)
+            for column in self.LINK_COLUMNS:
+                field = column if column == 'type' else f"_{column}"
+                link_codes[column].append(link_interners[column](link.get(field)))
+        self.source = np.frombuffer(source, dtype=np.int32)
+        self.target = np.frombuffer(target, dtype=np.int32)
+        self.keys = np.frombuffer(keys, dtype=np.int32)
+        self.link_columns = {
+            column: Column(link_codes[column], link_interners[column]) for column in self.LINK_COLUMNS
+        }
+        # Date index: links sorted by day (undated last) so a window is two binary searches
+        date_codes = self.link_columns['date_added'].codes
+        self.link_dates = np.append(_dates(self.link_columns['date_added'].values), np.datetime64('NaT'))[date_codes]
+        self.date_order = np.argsort(self.link_dates, kind='stable').astype(np.int32)
+        self.sorted_dates = self.link_dates[self.date_order]
+        self.dated_links = int((~np.isnat(self.link_dates)).sum())
+
+        n = len(self.ids)
+        self.out_offsets, self.out_edges = _csr(self.source, n)
+        self.in_offsets, self.in_edges = _csr(self.target, n)
+
+        # Neo4j naming, resolved once per distinct value: node label and link
+        # relationship type codes index ``labels`` / ``relationship_types``
+        # (a missing type, code -1, picks the trailing default)
+        node_types = self.node_columns['type'].values
+        labels, rel_types = Interner(), Interner()
+        to_label = [labels(node_label(t)) for t in node_types] + [labels('Unknown')]
+        to_rel_type = [rel_types(relationship_type(t)) for t in self.link_columns['type'].values] + [rel_types('RELATED')]
+        self.labels = labels.values
+        self.relationship_types = rel_types.values
+        self.node_label_codes = np.asarray(to_label, dtype=np.int32)[self.node_columns['type'].codes]
+        self.link_type_codes = np.asarray(to_rel_type, dtype=np.int32)[self.link_columns['type'].codes]
+        self.node_groups = np.asarray([node_group(t) for t in node_types] + [0], dtype=np.int32)
+        self._entity_index = None
+
+    @classmethod
+    def from_mc1(cls, mc1_file_path):
+        return cls(iter_nodes(mc1_file_path), iter_links(mc1_file_path))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def link_count(self):
+        return len(self.source)
+
+    def nodes(self, rows):
+        """Subgraph node dicts for an index array of nodes"""
+        groups = self.node_groups[self.node_columns['type'].codes[rows]].tolist()
+        types = self.node_columns['type'].take(rows)
+        countries = self.node_columns['country'].take(rows)
+        ids = self.ids
+        return [
+            {'id': ids[i], 'type': node_type or 'Unknown', 'country': country, 'group': group}
+            for i, node_type, country, group in zip(rows.tolist(), types, countries, groups)
+        ]
+
+    def node_properties(self, i):
+        properties = {'id': self.ids[i], 'country': self.node_columns['country'][i],
+                      'type': self.node_columns['type'][i] or 'Unknown'}
+        name = self.node_columns['name'][i]
+        if name is not None:
+            properties['name'] = name
+        return properties
+
+    def links(self, rows):
+        """Subgraph link dicts for an index array of links"""
+        columns = self.link_columns
+        rel_types = self.relationship_types
+        ids = self.ids
+        return [
+            {'source': ids[source], 'target': ids[target], 'type': rel_types[type_code],
+             'algorithm': algorithm, 'raw_source': raw_source, 'date_added': date_added,
+             'last_edited_by': last_edited_by}
+            for source, target, type_code, algorithm, raw_source, date_added, last_edited_by in zip(
+                self.source[rows].tolist(), self.target[rows].tolist(), self.link_type_codes[rows].tolist(),
+                columns['algorithm'].take(rows), columns['raw_source'].take(rows),
+                columns['date_added'].take(rows), columns['last_edited_by'].take(rows))
+        ]
+
+    def payload(self, link_ids, node_ids=()):
+        """``{'nodes', 'links'}`` for the given links plus their endpoints and ``node_ids``"""
+        link_ids = np.asarray(link_ids, dtype=np.int64)
+        node_ids = np.unique(np.concatenate([
+            np.asarray(node_ids, dtype=np.int64), self.source[link_ids], self.target[link_ids]
+        ]))
+        return {
+            'nodes': self.nodes(node_ids),
+            'links': self.links(link_ids),
+        }
+
+    def subgraph(self, limit=100, mode='first', seed=0):
+        """At most ``limit`` links with their endpoints, sampled as ``Neo4jManager.get_subgraph``"""
+        limit = min(limit, self.link_count)
+        if mode == 'random':
+            links = np.sort(np.random.default_rng(seed).choice(self.link_count, size=limit, replace=False))
+        elif mode == 'relationship':
+            counts = np.bincount(self.link_type_codes, minlength=len(self.relationship_types))
+            quotas = stratified_quotas(dict(enumerate(counts.tolist())), limit)
+            links = np.sort(np.concatenate([np.flatnonzero(self.link_type_codes == code)[:quota]
+                                            for code, quota in quotas.items()] or [[]]).astype(np.int64))
+        elif mode == 'label':
+            # One link for each of an even share of linked nodes per label
+            out_degree = np.diff(self.out_offsets)
+            linked = out_degree + np.diff(self.in_offsets) > 0
+            counts = np.bincount(self.node_label_codes[linked], minlength=len(self.labels))
+            quotas = stratified_quotas(dict(enumerate(counts.tolist())), limit)
+            picked = np.concatenate([np.flatnonzero(linked & (self.node_label_codes == code))[:quota]
+                                     for code, quota in quotas.items()] or [[]]).astype(np.int64)
+            has_out = out_degree[picked] > 0
+            links = np.unique(np.concatenate([self.out_edges[self.out_offsets[picked[has_out]]],
+                                              self.in_edges[self.in_offsets[picked[~has_out]]]]))
+        else:
+            links = np.arange(limit)
+        return self.payload(links)
+
+    def neighbors(self, i):
+        """Link indices touching node ``i`` (outgoing, then incoming)"""
+        return np.concatenate([
+            self.out_edges[self.out_offsets[i]:self.out_offsets[i + 1]],
+            self.in_edges[self.in_offsets[i]:self.in_offsets[i + 1]],
+        ])
+
+    @staticmethod
+    def _allowed(names, wanted):
+        """Boolean mask over name codes"""
+        return np.asarray([name in wanted for name in names], dtype=bool)
+
+    def neighborhood(self, node_id, hops=1, labels=None, rel_types=None, fanout=None, max_nodes=None):
+        """Bounded BFS from ``node_id`` over links in either direction.
+
+        Only links whose type is in ``rel_types`` and neighbours carrying one of
+        ``labels`` are followed (``None`` allows all). Each expanded node
+        contributes at most ``fanout`` links, and expansion stops once
+        ``max_nodes`` nodes are reached; either cap sets ``truncated``.
+        Returns ``None`` for an unknown seed.
+        """
+        seed = self.index.get(node_id)
+        if seed is None:
+            return None
+        type_allowed = self._allowed(self.relationship_types, set(rel_types)) if rel_types else None
+        label_allowed = self._allowed(self.labels, set(labels)) if labels else None
+        visited = np.zeros(len(self.ids), dtype=bool)
+        visited[seed] = True
+        taken = np.zeros(self.link_count, dtype=bool)
+        frontier, hop_links, node_count, truncated = [seed], [], 1, False
+        for _ in range(hops):
+            next_frontier = []
+            for i in frontier:
+                edges = self.neighbors(i)
+                if type_allowed is not None:
+                    edges = edges[type_allowed[self.link_type_codes[edges]]]
+                others = np.where(self.source[edges] == i, self.target[edges], self.source[edges])
+                if label_allowed is not None:
+                    keep = label_allowed[self.node_label_codes[others]]
+                    edges, others = edges[keep], others[keep]
+                # A link between two frontier nodes is reached from both ends
+                keep = ~taken[edges]
+                edges, others = edges[keep], others[keep]
+                if fanout and len(edges) > fanout:
+                    edges, others = edges[:fanout], others[:fanout]
+                    truncated = True
+                fresh = np.unique(others[~visited[others]])
+                if max_nodes and node_count + len(fresh) > max_nodes:
+                    fresh = fresh[:max_nodes - node_count]
+                    truncated = True
+                visited[fresh] = True
+                edges = edges[visited[others]]
+                taken[edges] = True
+                hop_links.append(edges)
+                next_frontier.extend(fresh.tolist())
+                node_count += len(fresh)
+                if max_nodes and node_count >= max_nodes:
+                    break
+            frontier = next_frontier
+            if not frontier or (max_nodes and node_count >= max_nodes):
+                break
+        links = np.concatenate(hop_links) if hop_links else np.empty(0, dtype=np.int64)
+        return dict(self.payload(links, [seed]), truncated=truncated)
+
+    def window(self, start=None, end=None, rel_types=None):
+        """Link indices dated in ``[start, end)`` (ISO days, either optional), in date order"""
+        lo = np.searchsorted(self.sorted_dates, np.datetime64(start, 'D')) if start else 0
+        hi = np.searchsorted(self.sorted_dates, np.datetime64(end, 'D')) if end else self.dated_links
+        links = self.date_order[lo:min(hi, self.dated_links)]
+        if rel_types:
+            links = links[self._allowed(self.relationship_types, set(rel_types))[self.link_type_codes[links]]]
+        return links
+
+    def time_window(self, start=None, end=None, limit=500, rel_types=None):
+        """Same shape as ``Neo4jManager.get_time_window``"""
+        links = self.window(start, end, rel_types)
+        return dict(self.payload(links[:limit]), truncated=bool(len(links) > limit))
+
+    def temporal_aggregate(self, start=None, end=None, bucket='month', rel_types=None):
+        """Same shape as ``Neo4jManager.get_temporal_aggregate``, counted in one pass over the window"""
+        links = self.window(start, end, rel_types)
+        days = self.link_dates[links]
+        if bucket == 'week':
+            # Day 0 (1970-01-01) is a Thursday; shift back to the Monday
+            starts = days - (days.astype(np.int64) + 3) % 7
+        else:
+            starts = days.astype({'day': 'datetime64[D]', 'month': 'datetime64[M]', 'year': 'datetime64[Y]'}[bucket])
+        names, bucket_codes = np.unique(starts, return_inverse=True)
+        n_types = len(self.relationship_types)
+        counts = np.bincount(bucket_codes * n_types + self.link_type_codes[links],
+                             minlength=len(names) * n_types).reshape(len(names), n_types)
+        return temporal_buckets(bucket, (start, end), {
+            name: {self.relationship_types[t]: int(row[t]) for t in np.flatnonzero(row).tolist()}
+            for name, row in zip(np.datetime_as_string(names).tolist(), counts)
+        })
+
+    def stats(self):
+        """Same shape as ``Neo4jManager.get_graph_stats``"""
+        label_counts = np.bincount(self.node_label_codes, minlength=len(self.labels)).tolist()
+        type_counts = np.bincount(self.link_type_codes, minlength=len(self.relationship_types)).tolist()
+        return {
+            'total_nodes': len(self.ids),
+            'total_relationships': self.link_count,
+            'node_types': sorted(({'label': l, 'count': c} for l, c in zip(self.labels, label_counts) if c),
+                                 key=lambda item: -item['count']),
+            'relationship_types': sorted(({'type': t, 'count': c} for t, c in zip(self.relationship_types, type_counts) if c),
+                                         key=lambda item: -item['count']),
+        }
+
+    def overview(self, sample_size=20):
+        """Same shape as ``Neo4jManager.get_graph_overview``"""
+        label_counts = np.bincount(self.node_label_codes, minlength=len(self.labels))
+        type_counts = np.bincount(self.link_type_codes, minlength=len(self.relationship_types))
+        nodes = {}
+        for code in np.flatnonzero(label_counts).tolist():
+            sample = np.flatnonzero(self.node_label_codes == code)[:sample_size]
+            nodes[self.labels[code]] = [
+                {'id': self.ids[i], 'properties': self.node_properties(i)} for i in sample.tolist()
+            ]
+        return {
+            'labels': list(nodes),
+            'relationshipTypes': [self.relationship_types[code] for code in np.flatnonzero(type_counts).tolist()],
+            'nodes': nodes,
+        }
+
+    def search(self, query, limit=20):
+        """Ranked entity search through an ``EntityIndex`` built on first use"""
+        if self._entity_index is None:
+            self._entity_index = EntityIndex([
+                {'id': self.ids[i], 'type': self.node_columns['type'][i] or 'Unknown',
+                 'country': self.node_columns['country'][i],
+                 **({'name': self.node_columns['name'][i]} if self.node_columns['name'][i] else {})}
+                for i in range(len(self.ids))
+            ])
+        return self._entity_index.search(query, limit)
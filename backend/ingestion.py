@@ -0,0 +1,383 @@
+"""
+Article ingestion pipeline for the Veda backend.
+
+Sentiment and entity extraction are CPU-bound (TextBlob + regex), so they are
+fanned out over a process pool. Workers only analyse; every result flows back
+to the calling thread, which is the single writer and commits in batches.
+
+Ingestion is incremental: ``scan_articles_folder`` only stats the folder and
+``plan_ingest`` compares size/mtime against the ``ingest_manifest`` table, so
+unchanged files are never opened. Files whose stat changed are hashed by the
+worker and only re-analysed when the content hash differs.
+
+``IngestJobManager`` runs ingests as background jobs so HTTP requests return
+immediately; progress is kept in memory and pushed to listeners, so status
+polling and the SSE stream never touch the filesystem or the database.
+"""
+
+import os
+import time
+import uuid
+import hashlib
+import threading
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from database import BiasAnalyzer
+
+MAX_CONTENT_LENGTH = 50000
+MAX_ENTITIES = 20
+
+# Per-process analyzer, created once by the pool initializer
+_worker_analyzer = None
+
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = BiasAnalyzer()
+
+
+def scan_articles_folder(articles_folder):
+    """Return {filename: (size, mtime_ns)} for every article file in the folder"""
+    scan = {}
+    with os.scandir(articles_folder) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.txt') or entry.name == 'README.md' or not entry.is_file():
+                continue
+            st = entry.stat()
+            scan[entry.name] = (st.st_size, st.st_mtime_ns)
+    return scan
+
+
+def plan_ingest(scan, manifest):
+    """Diff a folder scan against the manifest.
+
+    Returns ``(tasks, removed)``: ``tasks`` are ``(filename, size, mtime_ns,
+    known_hash)`` for new or changed files, ``removed`` are manifest filenames
+    no longer present on disk.
+    """
+    tasks = []
+    for filename, (size, mtime_ns) in sorted(scan.items()):
+        known = manifest.get(filename)
+        if known is not None and known[0] == size and known[1] == mtime_ns:
+            continue
+        tasks.append((filename, size, mtime_ns, known[2] if known else None))
+    removed = [f for f in manifest if f not in scan]
+    return tasks, removed
+
+
+def analyze_article_file(filepath, bias_analyzer=None, known_hash=None):
+    """Read one article file and run sentiment/entity extraction on it.
+
+    Returns a dict with a ``status`` of ``'analyzed'``, ``'unchanged'`` (content
+    hash matches ``known_hash``) or ``'skipped'`` (empty or too short).
+    """
+    with open(filepath, 'rb') as file:
+        raw = file.read()
+    content_hash = hashlib.sha256(raw).hexdigest()
+    result = {'filename': os.path.basename(filepath), 'content_hash': content_hash}
+    if content_hash == known_hash:
+        result['status'] = 'unchanged'
+        return result
+    content = raw.decode('utf-8', errors='ignore').replace('\r\n', '\n').strip()
+    if not content or len(content) < 10:
+        result['status'] = 'skipped'
+        return result
+    if len(content) > MAX_CONTENT_LENGTH:
+        content = content[:MAX_CONTENT_LENGTH] + "... [truncated]"
+    analyzer = bias_analyzer or _worker_analyzer
+    if analyzer is None:
+        analyzer = BiasAnalyzer()
+    result.update({
+        'status': 'analyzed',
+        'content': content,
+        'sentiment': analyzer.analyze_sentiment(content),
+        'entities': analyzer.extract_entities(content)[:MAX_ENTITIES],
+    })
+    return result
+
+
+def _safe_analyze(task):
+    # Runs inside the pool; never let one bad file kill the whole chunk
+    filepath, known_hash = task
+    try:
+        return analyze_article_file(filepath, known_hash=known_hash)
+    except Exception as e:
+        print(f"Error analyzing {filepath}: {e}")
+        return {'filename': os.path.basename(filepath), 'status': 'failed'}
+
+
+def ingest_articles(articles_folder, tasks, db_manager, bias_analyzer=None,
+                    workers=1, chunk_size=8, batch_size=200, sample_size=20, job=None):
+    """Analyse the planned ``tasks`` and write them to ``db_manager`` in batches.
+
+    With ``workers > 1`` the analysis runs in a process pool, otherwise it runs
+    in-process with ``bias_analyzer``. Returns a summary dict with per-status
+    counts and ``samples`` of the first articles written. Files in a batch
+    whose write fails count as ``failed`` and are listed in ``write_errors``.
+    When an ``IngestJob`` is given its counters are updated per file and the
+    run stops early once the job is cancelled.
+    """
+    stats_by_name = {t[0]: (t[1], t[2]) for t in tasks}
+    work = [(os.path.join(articles_folder, t[0]), t[3]) for t in tasks]
+    workers = max(1, min(int(workers or 1), len(work) or 1))
+    summary = {'processed': 0, 'unchanged': 0, 'skipped': 0, 'failed': 0, 'write_errors': 0, 'samples': []}
+    pending_articles = []
+    pending_manifest = []
+    pending_removed = []
+    pending_statuses = []
+
+    def flush():
+        if pending_articles or pending_manifest:
+            written = db_manager.insert_articles(pending_articles, pending_manifest, pending_removed)
+            if written is False:
+                # Nothing in the batch was stored, manifest included: report its files as failed
+                for status in pending_statuses:
+                    if status != 'analyzed':
+                        summary[status] -= 1
+                summary['failed'] += len(pending_statuses)
+                summary['write_errors'] += len(pending_statuses)
+                lost = {a['filename'] for a in pending_articles}
+                summary['samples'] = [sample for sample in summary['samples'] if sample['filename'] not in lost]
+                if job is not None:
+                    job.record_write_failure(pending_statuses)
+            else:
+                summary['processed'] += written
+            pending_articles.clear()
+            pending_manifest.clear()
+            pending_removed.clear()
+            pending_statuses.clear()
+
+    def collect(result):
+        status = result['status']
+        if job is not None:
+            job.record(status)
+        if status == 'failed':
+            summary['failed'] += 1
+            return
+        size, mtime_ns = stats_by_name[result['filename']]
+        pending_manifest.append((result['filename'], size, mtime_ns, result['content_hash']))
+        pending_statuses.append(status)
+        if status != 'analyzed':
+            summary[status] += 1
+            if status == 'skipped':
+                # A previously analysed file that is now empty or too short must not keep its old article
+                pending_removed.append(result['filename'])
+        else:
+            pending_articles.append(result)
+            if len(summary['samples']) < sample_size:
+                summary['samples'].append({
+                    'filename': result['filename'],
+                    'sentiment': result['sentiment'],
+                    'entities': result['entities'][:5],
+                    'word_count': len(result['content'].split())
+                })
+        if len(pending_manifest) >= batch_size:
+            flush()
+
+    if workers == 1:
+        analyzer = bias_analyzer or BiasAnalyzer()
+        for filepath, known_hash in work:
+            if job is not None and job.cancel_requested:
+                break
+            try:
+                result = analyze_article_file(filepath, analyzer, known_hash)
+            except Exception as e:
+                print(f"Error analyzing {filepath}: {e}")
+                result = {'filename': os.path.basename(filepath), 'status': 'failed'}
+            collect(result)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        try:
+            for result in executor.map(_safe_analyze, work, chunksize=max(1, int(chunk_size))):
+                collect(result)
+                if job is not None and job.cancel_requested:
+                    break
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    flush()
+    return summary
+
+
+class IngestJob:
+    """Progress and cancellation state for one background ingest"""
+
+    FINISHED_STATES = ('completed', 'completed_with_errors', 'failed', 'cancelled')
+
+    def __init__(self, articles_folder):
+        self.id = uuid.uuid4().hex[:12]
+        self.articles_folder = articles_folder
+        self.state = 'queued'
+        self.error = None
+        self.total_files = 0
+        self.to_process = 0
+        self.counts = {'analyzed': 0, 'unchanged': 0, 'skipped': 0, 'failed': 0}
+        self.purged = 0
+        self.write_errors = 0
+        self.samples = []
+        self.created_at = datetime.now().isoformat()
+        self.started = None
+        self.finished = None
+        self.version = 0
+        self._cancel = threading.Event()
+        self._cond = threading.Condition()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def finished_state(self):
+        return self.state in self.FINISHED_STATES
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _changed(self):
+        # Caller holds self._cond
+        self.version += 1
+        self._cond.notify_all()
+
+    def begin(self, total_files, to_process, purged):
+        # Files skipped by the stat check count as unchanged up front
+        with self._cond:
+            self.state = 'running'
+            self.started = time.time()
+            self.total_files = total_files
+            self.to_process = to_process
+            self.counts['unchanged'] = total_files - to_process
+            self.purged = purged
+            self._changed()
+
+    def record(self, status):
+        with self._cond:
+            self.counts[status] += 1
+            self._changed()
+
+    def record_write_failure(self, statuses):
+        """Move files already recorded with ``statuses`` to failed: their batch was not stored"""
+        with self._cond:
+            for status in statuses:
+                self.counts[status] -= 1
+            self.counts['failed'] += len(statuses)
+            self.write_errors += len(statuses)
+            self._changed()
+
+    def finish(self, state, error=None, samples=None):
+        with self._cond:
+            self.state = state
+            self.error = error
+            self.samples = samples or []
+            self.finished = time.time()
+            self._changed()
+
+    def wait(self, timeout=None):
+        """Block until the job reaches a finished state"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.finished_state, timeout)
+
+    def wait_for_update(self, version, timeout=None):
+        """Block until the job moves past ``version``; returns the new snapshot or None on timeout"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.version != version, timeout):
+                return None
+            return self._snapshot()
+
+    def snapshot(self):
+        with self._cond:
+            return self._snapshot()
+
+    def _snapshot(self):
+        done = sum(self.counts.values())
+        worked = done - (self.total_files - self.to_process)
+        elapsed = 0.0
+        if self.started:
+            elapsed = (self.finished or time.time()) - self.started
+        return {
+            'job_id': self.id,
+            'state': self.state,
+            'error': self.error,
+            'version': self.version,
+            'total_files': self.total_files,
+            'to_process': self.to_process,
+            'processed': self.counts['analyzed'],
+            'unchanged': self.counts['unchanged'],
+            'skipped': self.counts['skipped'],
+            'failed': self.counts['failed'],
+            'write_errors': self.write_errors,
+            'purged': self.purged,
+            'remaining': max(self.total_files - done, 0),
+            'progress_percentage': (done / self.total_files * 100) if self.total_files else (100.0 if self.finished_state else 0.0),
+            'elapsed_seconds': round(elapsed, 3),
+            'throughput': round(worked / elapsed, 2) if elapsed > 0 else 0.0,
+            'created_at': self.created_at,
+            'samples': self.samples[:10]
+        }
+
+
+class IngestJobManager:
+    """Runs one ingest at a time on a background thread and keeps recent jobs"""
+
+    def __init__(self, db_manager, bias_analyzer=None, max_history=20):
+        self.db_manager = db_manager
+        self.bias_analyzer = bias_analyzer
+        self.max_history = max_history
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def start(self, articles_folder, workers=1, chunk_size=8, batch_size=200):
+        """Start a job, or return the one already running; returns ``(job, created)``"""
+        with self._lock:
+            active = self.active()
+            if active is not None:
+                return active, False
+            job = IngestJob(articles_folder)
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.max_history:
+                oldest = next(iter(self.jobs))
+                if not self.jobs[oldest].finished_state:
+                    break
+                del self.jobs[oldest]
+        thread = threading.Thread(
+            target=self._run, args=(job, workers, chunk_size, batch_size),
+            name=f"ingest-{job.id}", daemon=True
+        )
+        thread.start()
+        return job, True
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def active(self):
+        for job in list(self.jobs.values()):
+            if not job.finished_state:
+                return job
+        return None
+
+    def latest(self):
+        jobs = list(self.jobs.values())
+        return jobs[-1] if jobs else None
+
+    def _run(self, job, workers, chunk_size, batch_size):
+        try:
+            scan = scan_articles_folder(job.articles_folder)
+            if not scan:
+                job.finish('failed', error='No .txt files found in articles folder')
+                return
+            tasks, removed = plan_ingest(scan, self.db_manager.get_ingest_manifest())
+            purged = self.db_manager.purge_articles(removed)
+            job.begin(len(scan), len(tasks), purged)
+            summary = ingest_articles(
+                job.articles_folder, tasks, self.db_manager, self.bias_analyzer,
+                workers=workers, chunk_size=chunk_size, batch_size=batch_size, job=job
+            )
+            if job.cancel_requested:
+                job.finish('cancelled', samples=summary['samples'])
+            elif summary['write_errors']:
+                job.finish('completed_with_errors', samples=summary['samples'],
+                           error=f"{summary['write_errors']} files could not be written to the database")
+            else:
+                job.finish('completed', samples=summary['samples'])
+        except Exception as e:
+            print(f"Ingest job {job.id} failed: {e}")
+            job.finish('failed', error=str(e))
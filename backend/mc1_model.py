@@ -0,0 +1,99 @@
+"""
+MC1 naming and payload helpers shared by ``Neo4jManager`` and ``GraphEngine``.
+
+Both backends map MC1 node and link types onto the same labels, relationship
+types and colour groups, and return the same node, link and time-bucket
+shapes, so the views cannot tell which one answered.
+"""
+
+from datetime import date, timedelta
+
+# Property hash stored on every loaded node and relationship for delta loads;
+# internal bookkeeping, never returned to clients
+FINGERPRINT = '_fingerprint'
+
+
+def node_label(node_type):
+    """Neo4j label for an MC1 node type (last dotted segment)"""
+    return node_type.split('.')[-1] if '.' in node_type else node_type
+
+
+def node_group(node_type):
+    """Colour group used by the network views for an MC1 node type"""
+    type_groups = {
+        'FishingCompany': 1,
+        'LogisticsCompany': 2,
+        'NewsSource': 3,
+        'Person': 4,
+        'Location': 5,
+        'Organization': 6
+    }
+    for key, group in type_groups.items():
+        if key in node_type:
+            return group
+    return 0
+
+
+def relationship_type(link_type):
+    """Neo4j relationship type for an MC1 link type"""
+    return link_type.replace('.', '_').replace('-', '_').replace(' ', '_')
+
+
+def public_properties(properties):
+    """Stored node/relationship properties without the internal fingerprint"""
+    return {k: v for k, v in properties.items() if k != FINGERPRINT}
+
+
+def view_node(properties):
+    """Node dict used by the subgraph and neighbourhood payloads"""
+    node_type = properties.get('type') or 'Unknown'
+    return {'id': properties['id'], 'type': node_type, 'country': properties.get('country'),
+            'group': node_group(node_type)}
+
+
+def view_link(source, target, rel_type, properties):
+    """Link dict used by the subgraph and neighbourhood payloads"""
+    return {
+        'source': source,
+        'target': target,
+        'type': rel_type,
+        'algorithm': properties.get('algorithm'),
+        'raw_source': properties.get('raw_source'),
+        'date_added': properties.get('date_added'),
+        'last_edited_by': properties.get('last_edited_by')
+    }
+
+
+def time_window(start=None, end=None):
+    """``(start, end)`` ISO day strings for an inclusive date range, ``end`` made exclusive.
+
+    Either bound may be ``None``; raises ValueError for malformed dates.
+    """
+    start = date.fromisoformat(start[:10]).isoformat() if start else None
+    end = (date.fromisoformat(end[:10]) + timedelta(days=1)).isoformat() if end else None
+    return start, end
+
+
+def temporal_buckets(bucket, window, counts):
+    """Aggregation payload from ``{bucket start: {relationship type: count}}``"""
+    buckets = [
+        {'start': start, 'count': sum(types.values()), 'types': types}
+        for start, types in sorted(counts.items())
+    ]
+    return {
+        'bucket': bucket,
+        'from': window[0],
+        'to': (date.fromisoformat(window[1]) - timedelta(days=1)).isoformat() if window[1] else None,
+        'total': sum(b['count'] for b in buckets),
+        'buckets': buckets,
+    }
+
+
+def stratified_quotas(counts, limit):
+    """Split ``limit`` evenly across strata (name -> size), passing what small strata cannot fill to the rest"""
+    strata = sorted(((count, name) for name, count in counts.items() if count > 0))
+    quotas = {}
+    for i, (count, name) in enumerate(strata):
+        quotas[name] = min(count, limit // (len(strata) - i))
+        limit -= quotas[name]
+    return {name: quota for name, quota in quotas.items() if quota}
@@ -0,0 +1,158 @@
+"""
+Streaming reader for MC1 node-link JSON dumps.
+
+``json.load`` materialises the whole graph before anything can use it, which
+does not fit small containers once dumps grow past the challenge file. This
+reader walks the top-level object incrementally and decodes one array element
+at a time with ``json.JSONDecoder.raw_decode``, so peak memory is bounded by
+the read chunk plus the largest single node or link.
+
+``iter_nodes`` / ``iter_links`` stream one section each; ``MC1File`` wraps a
+path in a dict-like object (``.get('links', [])``, ``len``, iteration) so
+code written against ``json.load`` output keeps working unchanged.
+"""
+
+import os
+import json
+
+CHUNK_SIZE = 1 << 16
+_WHITESPACE = ' \t\n\r'
+_decoder = json.JSONDecoder()
+
+
+class _Scanner:
+    """Minimal pull parser over a text file, keeping only an unconsumed window"""
+
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop the consumed prefix so the window never grows past one value
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character without consuming it ('' at EOF)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Malformed MC1 JSON: expected one of {chars!r}, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number or literal touching the window edge may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def array_items(self):
+        """Yield the elements of the array starting at the cursor"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+
+def iter_section(path, section, chunk_size=CHUNK_SIZE):
+    """Yield the elements of one top-level array (``'nodes'`` or ``'links'``)"""
+    with open(path, 'r', encoding='utf-8') as file:
+        scanner = _Scanner(file, chunk_size)
+        scanner.expect('{')
+        if scanner.peek() == '}':
+            return
+        while True:
+            key = scanner.value()
+            scanner.expect(':')
+            if key == section and scanner.peek() == '[':
+                yield from scanner.array_items()
+                return
+            if scanner.peek() == '[':
+                # Skip other sections element by element instead of decoding them whole
+                for _ in scanner.array_items():
+                    pass
+            else:
+                scanner.value()
+            if scanner.expect(',}') == '}':
+                return
+
+
+def iter_nodes(path, chunk_size=CHUNK_SIZE):
+    return iter_section(path, 'nodes', chunk_size)
+
+
+def iter_links(path, chunk_size=CHUNK_SIZE):
+    return iter_section(path, 'links', chunk_size)
+
+
+class MC1Section:
+    """Re-iterable view of one section; every iteration streams the file again"""
+
+    def __init__(self, path, section):
+        self.path = path
+        self.section = section
+        self._length = None
+
+    def __iter__(self):
+        return iter_section(self.path, self.section)
+
+    def __len__(self):
+        if self._length is None:
+            self._length = sum(1 for _ in self)
+        return self._length
+
+
+class MC1File:
+    """Dict-like stand-in for ``json.load(mc1_file)`` backed by streaming sections"""
+
+    SECTIONS = ('nodes', 'links')
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self.nodes = MC1Section(path, 'nodes')
+        self.links = MC1Section(path, 'links')
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.SECTIONS else default
+
+    def __getitem__(self, key):
+        if key not in self.SECTIONS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.SECTIONS
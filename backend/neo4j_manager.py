@@ -1,18 +1,183 @@
 import os
 import json
+import time
+import zlib
+import hashlib
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from entity_index import lucene_query
+from graph_engine import GraphEngine
+from mc1_model import (
+    FINGERPRINT, node_group, node_label, public_properties, relationship_type, stratified_quotas, temporal_buckets,
+    time_window, view_link, view_node
+)
+from mc1_reader import iter_links, iter_nodes
+from neo4j_serializer import GraphSerializer
+from query_cache import QueryCache, cache_key, is_deterministic
 
 try:
-    from neo4j import GraphDatabase
+    from neo4j import GraphDatabase, Query
+    from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
     NEO4J_AVAILABLE = True
+    TRANSIENT_ERRORS = (TransientError, ServiceUnavailable, SessionExpired)
+    # The server is unreachable; reads fall back to the in-process graph engine
+    UNAVAILABLE_ERRORS = (ServiceUnavailable, SessionExpired)
 except ImportError:
     NEO4J_AVAILABLE = False
+    TRANSIENT_ERRORS = ()
+    UNAVAILABLE_ERRORS = ()
+
+
+# Shared label on every MC1 node; its unique id constraint backs all
+# label-agnostic id lookups (relationship endpoints, search, expansion)
+LOOKUP_LABEL = 'MC1Node'
+
+# Singleton node holding the graph version, bumped by every load that changes the graph
+GRAPH_LABEL = 'MC1Graph'
+
+# Full-text index over MC1 node ids and names backing entity search
+SEARCH_INDEX = 'mc1_entity_search'
+
+# Upper bound on neighbourhood expansion depth
+MAX_HOPS = 4
+
+# get_subgraph sampling modes: first matches, stratified by node label or
+# relationship type, and seeded random links
+SAMPLING_MODES = ('first', 'label', 'relationship', 'random')
+
+# Reproducible shuffle for random sampling: a multiplicative hash with the seed
+# mixed in before the multiply, so every seed gives a different order (seeds are
+# reduced below 2**31 to keep the product inside 64-bit integers)
+RANDOM_ORDER = "((id(r) + $seed) * 2654435761) % 4294967311"
+
+# Temporal aggregation bucket sizes and the Cypher expression naming each
+# link's bucket (weeks start on Monday and are named by that day)
+TIME_BUCKETS = {
+    'day': "left(r.date_added, 10)",
+    'week': "toString(date.truncate('week', date(left(r.date_added, 10))))",
+    'month': "left(r.date_added, 7)",
+    'year': "left(r.date_added, 4)",
+}
+
+DEFAULT_MC1_PATH = os.path.join(os.path.dirname(__file__), '..', 'mc1.json')
+
+
+def node_properties(node):
+    return {'id': node['id'], 'country': node.get('country'), 'type': node.get('type', 'Unknown')}
+
+
+def link_properties(link):
+    return {
+        'key': link.get('key') or 0,
+        'type': link.get('type'),
+        'date_added': link.get('_date_added'),
+        'raw_source': link.get('_raw_source'),
+        'algorithm': link.get('_algorithm'),
+        'last_edited_by': link.get('_last_edited_by'),
+        'article_id': link.get('_articleid')
+    }
+
+
+def fingerprint(properties):
+    """Short stable hash of a property dict"""
+    payload = json.dumps(properties, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+def node_row(node):
+    props = node_properties(node)
+    props[FINGERPRINT] = fingerprint(props)
+    return {'id': props['id'], 'properties': props}
+
+
+def link_row(link):
+    props = link_properties(link)
+    props[FINGERPRINT] = fingerprint(props)
+    return {'source': link['source'], 'target': link['target'], 'key': props['key'], 'properties': props}
+
+
+def date_range_predicate(start, end):
+    """Cypher predicate on ``r.date_added`` for ``time_window`` bounds (``$start`` / ``$end``)"""
+    conditions = []
+    if start:
+        conditions.append("r.date_added >= $start")
+    if end:
+        conditions.append("r.date_added < $end")
+    return ' AND '.join(conditions) or "r.date_added IS NOT NULL"
+
+
+def index_name(prefix, name, suffix):
+    return f"mc1_{prefix}" + ''.join(c if c.isalnum() else '_' for c in name.lower()) + suffix
+
+
+def node_upsert_query(label, previous_label=None):
+    """UNWIND upsert for one label; drops ``previous_label`` when a node changed type"""
+    relabel = f"REMOVE n:`{previous_label}`" if previous_label and previous_label != label else ''
+    return f"""
+    UNWIND $rows AS row
+    MERGE (n:{LOOKUP_LABEL} {{id: row.id}})
+    {relabel}
+    SET n:`{label}`
+    SET n = row.properties
+    """
+
+
+def relationship_upsert_query(rel_type):
+    # MC1 is a multigraph: parallel links of one type are told apart by their key
+    return f"""
+    UNWIND $rows AS row
+    MATCH (a:{LOOKUP_LABEL} {{id: row.source}})
+    MATCH (b:{LOOKUP_LABEL} {{id: row.target}})
+    MERGE (a)-[r:`{rel_type}` {{key: row.key}}]->(b)
+    SET r = row.properties
+    """
+
+
+def partition_rounds(buckets):
+    """Schedule bucket pairs so that no two pairs in a round share a bucket.
+
+    Round 0 holds the diagonal (i, i) cells; the rest is a round-robin
+    tournament over an even number of buckets, so every unordered pair of
+    buckets appears in exactly one round.
+    """
+    rounds = [[(i, i) for i in range(buckets)]]
+    ring = list(range(buckets))
+    for _ in range(buckets - 1):
+        rounds.append([tuple(sorted((ring[i], ring[-1 - i]))) for i in range(buckets // 2)])
+        ring = [ring[0], ring[-1]] + ring[1:-1]
+    return rounds
 
 
 class Neo4jManager:
-    def __init__(self, uri, user, password):
+    def __init__(self, uri, user, password, batch_size=1000, max_retries=3, load_workers=1, stats_ttl=30,
+                 query_timeout=30, stream_row_limit=100000, stream_fetch_size=1000,
+                 query_cache_bytes=64 * 1024 * 1024, query_cache_ttl=60, mc1_path=None,
+                 neighborhood_max_nodes=2000, offline_retry=10):
         self.uri = uri
         self.user = user
         self.password = password
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.load_workers = load_workers
+        self.stats_ttl = stats_ttl
+        self.query_timeout = query_timeout
+        self.stream_row_limit = stream_row_limit
+        self.stream_fetch_size = stream_fetch_size
+        self.query_cache = QueryCache(query_cache_bytes, query_cache_ttl) if query_cache_bytes else None
+        self.mc1_path = mc1_path or DEFAULT_MC1_PATH
+        self.neighborhood_max_nodes = neighborhood_max_nodes
+        self.offline_retry = offline_retry
+        self._offline_until = 0
+        self._graph_engine = None
+        self._graph_engine_lock = threading.Lock()
+        self.graph_version = 0
+        self._stats_cache = None
+        self._overview_cache = None
+        self._stats_lock = threading.Lock()
+        self._graph_counts_supported = True
         self.driver = None
         if NEO4J_AVAILABLE:
             try:
@@ -35,6 +200,7 @@ class Neo4jManager:
         if not self.driver:
             return False
         try:
+            self.invalidate_caches()
             summary = self.driver.execute_query("MATCH (n) DETACH DELETE n").summary
             print(f"✅ Cleared {summary.counters.nodes_deleted} nodes, {summary.counters.relationships_deleted} relationships")
             return True
@@ -49,8 +215,8 @@ class Neo4jManager:
         properties['id'] = node_id
         properties['type'] = node_type
         try:
-            label = node_type.split('.')[-1] if '.' in node_type else node_type
-            query = f"MERGE (n:{label} {{id: $id}}) SET n += $properties"
+            label = node_label(node_type)
+            query = f"MERGE (n:{LOOKUP_LABEL} {{id: $id}}) SET n:`{label}` SET n += $properties"
             self.driver.execute_query(query, id=node_id, properties=properties)
             return True
         except Exception as e:
@@ -62,9 +228,9 @@ class Neo4jManager:
             return False
         properties = properties or {}
         try:
-            clean_rel_type = rel_type.replace('.', '_').replace('-', '_').replace(' ', '_')
+            clean_rel_type = relationship_type(rel_type)
             query = f"""
-            MATCH (a {{id: $source_id}}), (b {{id: $target_id}})
+            MATCH (a:{LOOKUP_LABEL} {{id: $source_id}}), (b:{LOOKUP_LABEL} {{id: $target_id}})
             MERGE (a)-[r:{clean_rel_type}]->(b)
             SET r += $properties
             """
@@ -74,7 +240,196 @@ class Neo4jManager:
             print(f"Error creating relationship {source_id} -> {target_id}: {e}")
             return False
 
-    def load_mc1_data(self, mc1_file_path):
+    def ensure_schema(self, labels=(), rel_types=()):
+        """Create id uniqueness constraints for the lookup label and each MC1 label, the search index
+        and a ``date_added`` range index for each relationship type"""
+        if not self.driver:
+            return False
+        statements = [
+            f"CREATE CONSTRAINT mc1_node_id IF NOT EXISTS FOR (n:{LOOKUP_LABEL}) REQUIRE n.id IS UNIQUE",
+            f"CREATE FULLTEXT INDEX {SEARCH_INDEX} IF NOT EXISTS FOR (n:{LOOKUP_LABEL}) ON EACH [n.id, n.name]"
+        ]
+        for label in sorted(set(labels)):
+            statements.append(f"CREATE CONSTRAINT {index_name('', label, '_id')} IF NOT EXISTS "
+                              f"FOR (n:`{label}`) REQUIRE n.id IS UNIQUE")
+        # Relationship property indexes are per type; they back time-window range scans
+        for rel_type in sorted(set(rel_types)):
+            statements.append(f"CREATE RANGE INDEX {index_name('rel_', rel_type, '_date_added')} IF NOT EXISTS "
+                              f"FOR ()-[r:`{rel_type}`]-() ON (r.date_added)")
+        try:
+            for statement in statements:
+                self.driver.execute_query(statement)
+            # Constraint-backed indexes must be online before the load relies on them
+            self.driver.execute_query("CALL db.awaitIndexes(300)")
+            return True
+        except Exception as e:
+            print(f"Error creating constraints: {e}")
+            return False
+
+    def _write_batch(self, query, rows):
+        """Run one UNWIND batch, retrying transient failures with backoff"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.driver.execute_query(query, rows=rows)
+                return
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = 0.5 * (2 ** attempt)
+                print(f"Transient Neo4j error ({e.__class__.__name__}), retrying batch in {delay:.1f}s...")
+                time.sleep(delay)
+
+    def _write_grouped(self, items, batch_size, on_new_group=None):
+        """Write ``(group, query, row)`` items in per-group UNWIND batches.
+
+        Only one partial batch per group is buffered, so arbitrarily long
+        streams are written with bounded memory. Returns {group: rows written}.
+        """
+        pending = {}
+        written = defaultdict(int)
+        for group, query, row in items:
+            if group not in pending:
+                if on_new_group is not None and group not in written:
+                    on_new_group(group)
+                pending[group] = (query, [])
+            rows = pending[group][1]
+            rows.append(row)
+            if len(rows) >= batch_size:
+                self._write_batch(query, rows)
+                written[group] += len(rows)
+                del pending[group]
+        for group, (query, rows) in pending.items():
+            self._write_batch(query, rows)
+            written[group] += len(rows)
+        return dict(written)
+
+    def load_nodes(self, nodes, batch_size=None):
+        """MERGE nodes grouped by label with UNWIND batches; returns nodes written.
+
+        ``nodes`` may be any iterable, e.g. ``mc1_reader.iter_nodes``; the id
+        constraint for each label is created the first time it is seen.
+        """
+        batch_size = batch_size or self.batch_size
+
+        def rows():
+            for node in nodes:
+                row = node_row(node)
+                label = node_label(row['properties']['type'])
+                yield label, node_upsert_query(label), row
+
+        written = self._write_grouped(rows(), batch_size, on_new_group=lambda label: self.ensure_schema([label]))
+        for label, count in written.items():
+            print(f"Loaded {count} nodes ({label})")
+        return sum(written.values())
+
+    def _write_partitioned(self, items, batch_size, workers, partition_stats=None):
+        """Write ``(group, query, row)`` relationship items from concurrent sessions.
+
+        Endpoint ids are hashed into ``2 * workers`` buckets and each link is
+        spilled to the cell of its (unordered) bucket pair. Cells are then
+        written round by round with ``partition_rounds``: cells running
+        together never share a bucket, so concurrent MERGEs never lock the
+        same endpoint nodes. Per-cell timings are appended to
+        ``partition_stats``. Returns {group: rows written}.
+        """
+        buckets = 2 * workers
+        queries = {}
+        written = defaultdict(int)
+        with tempfile.TemporaryDirectory(prefix='mc1-partitions-') as spill_dir:
+            files = {}
+            try:
+                for group, query, row in items:
+                    queries.setdefault(group, query)
+                    cell = tuple(sorted((
+                        zlib.crc32(str(row['source']).encode('utf-8')) % buckets,
+                        zlib.crc32(str(row['target']).encode('utf-8')) % buckets
+                    )))
+                    if cell not in files:
+                        files[cell] = open(os.path.join(spill_dir, f"{cell[0]}-{cell[1]}.jsonl"), 'w', encoding='utf-8')
+                    files[cell].write(json.dumps([group, row]) + '\n')
+            finally:
+                for file in files.values():
+                    file.close()
+
+            def write_cell(round_index, cell):
+                started = time.time()
+                with open(os.path.join(spill_dir, f"{cell[0]}-{cell[1]}.jsonl"), 'r', encoding='utf-8') as file:
+                    cell_items = ((group, queries[group], row) for group, row in map(json.loads, file))
+                    counts = self._write_grouped(cell_items, batch_size)
+                return round_index, cell, counts, time.time() - started
+
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='neo4j-load') as executor:
+                for round_index, cells in enumerate(partition_rounds(buckets)):
+                    futures = [executor.submit(write_cell, round_index, cell) for cell in cells if cell in files]
+                    for future in futures:
+                        round_index, cell, counts, seconds = future.result()
+                        for group, count in counts.items():
+                            written[group] += count
+                        total = sum(counts.values())
+                        if partition_stats is not None:
+                            partition_stats.append({
+                                'round': round_index,
+                                'partition': f"{cell[0]}-{cell[1]}",
+                                'relationships': total,
+                                'seconds': round(seconds, 3),
+                                'relationships_per_second': round(total / seconds, 1) if seconds > 0 else None,
+                            })
+        return dict(written)
+
+    def load_relationships(self, links, batch_size=None, workers=None, partition_stats=None):
+        """MERGE relationships grouped by type with UNWIND batches; returns links written.
+
+        With ``workers > 1`` the links are written by concurrent sessions over
+        endpoint-disjoint partitions (see ``_write_partitioned``).
+        """
+        batch_size = batch_size or self.batch_size
+        workers = workers or self.load_workers
+
+        def rows():
+            for link in links:
+                rel_type = relationship_type(link.get('type', 'RELATED'))
+                yield rel_type, relationship_upsert_query(rel_type), link_row(link)
+
+        if workers > 1:
+            written = self._write_partitioned(rows(), batch_size, workers, partition_stats)
+        else:
+            written = self._write_grouped(rows(), batch_size)
+        for rel_type, count in written.items():
+            print(f"Loaded {count} relationships ({rel_type})")
+        return sum(written.values())
+
+    def get_graph_version(self):
+        """Current graph version (0 when nothing has been loaded)"""
+        if not self.driver:
+            return 0
+        try:
+            records, _, _ = self.driver.execute_query(f"MATCH (g:{GRAPH_LABEL}) RETURN g.version AS version")
+            version = records[0]['version'] if records else None
+            self.graph_version = version or 0
+        except Exception as e:
+            print(f"Error reading graph version: {e}")
+        return self.graph_version
+
+    def _set_graph_version(self, version, mode):
+        self.driver.execute_query(f"""
+            MERGE (g:{GRAPH_LABEL} {{name: 'mc1'}})
+            SET g.version = $version, g.mode = $mode, g.updated_at = datetime()
+        """, version=version, mode=mode)
+        self.graph_version = version
+        self.invalidate_caches()
+
+    def load_mc1_data(self, mc1_file_path, batch_size=None, mode='full', workers=None):
+        """Clear the graph and stream MC1 into it with batched UNWIND writes.
+
+        Nodes and links are read incrementally with ``mc1_reader`` so memory
+        stays flat regardless of the dump size. ``mode='delta'`` applies only
+        the changes instead (see ``load_mc1_delta``). ``workers`` (default
+        ``load_workers``) sets the number of concurrent relationship writer
+        sessions. Returns a dict of load counts and throughput, or False on
+        failure.
+        """
+        if mode == 'delta':
+            return self.load_mc1_delta(mc1_file_path, batch_size, workers)
         if not self.driver:
             print("Neo4j driver not available")
             return False
@@ -83,151 +438,622 @@ class Neo4jManager:
             return False
         try:
             print("Loading MC1 data into Neo4j...")
-            with open(mc1_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            previous_version = self.get_graph_version()
             self.clear_database()
-            nodes_loaded = 0
-            for node in data.get('nodes', []):
-                if self.create_node(
-                    node_id=node['id'],
-                    node_type=node.get('type', 'Unknown'),
-                    properties={'country': node.get('country'), 'type': node.get('type')}
-                ):
-                    nodes_loaded += 1
-                if nodes_loaded % 100 == 0:
-                    print(f"Loaded {nodes_loaded} nodes...")
-            links_loaded = 0
-            for link in data.get('links', []):
-                if self.create_relationship(
-                    source_id=link['source'],
-                    target_id=link['target'],
-                    rel_type=link.get('type', 'RELATED'),
-                    properties={
-                        'type': link.get('type'),
-                        'date_added': link.get('_date_added'),
-                        'raw_source': link.get('_raw_source'),
-                        'algorithm': link.get('_algorithm'),
-                        'last_edited_by': link.get('_last_edited_by'),
-                        'article_id': link.get('_articleid')
-                    }
-                ):
-                    links_loaded += 1
-                if links_loaded % 100 == 0:
-                    print(f"Loaded {links_loaded} relationships...")
-            print(f"Successfully loaded {nodes_loaded} nodes and {links_loaded} relationships")
-            return True
+            self.ensure_schema()
+            started = time.time()
+            nodes_loaded = self.load_nodes(iter_nodes(mc1_file_path), batch_size)
+            nodes_done = time.time()
+            workers = workers or self.load_workers
+            partitions = []
+            links_loaded = self.load_relationships(iter_links(mc1_file_path), batch_size, workers, partitions)
+            finished = time.time()
+            node_seconds = nodes_done - started
+            link_seconds = finished - nodes_done
+            # Built once after the bulk write rather than maintained during it
+            self.ensure_schema(rel_types=self.get_relationship_types())
+            self._set_graph_version(previous_version + 1, 'full')
+            stats = {
+                'mode': 'full',
+                'graph_version': self.graph_version,
+                'nodes_loaded': nodes_loaded,
+                'relationships_loaded': links_loaded,
+                'seconds': round(finished - started, 3),
+                'nodes_per_second': round(nodes_loaded / node_seconds, 1) if node_seconds > 0 else None,
+                'relationships_per_second': round(links_loaded / link_seconds, 1) if link_seconds > 0 else None,
+                'workers': workers,
+            }
+            if partitions:
+                stats['partitions'] = partitions
+            print(f"Successfully loaded {nodes_loaded} nodes and {links_loaded} relationships in {stats['seconds']}s "
+                  f"({stats['nodes_per_second']} nodes/s, {stats['relationships_per_second']} relationships/s)")
+            return stats
         except Exception as e:
             print(f"Error loading MC1 data: {e}")
             return False
 
-    def get_graph_stats(self):
+    def load_mc1_delta(self, mc1_file_path, batch_size=None, workers=None):
+        """Apply only the node/link inserts, updates and deletes since the last load.
+
+        Nodes are identified by id and links by (source, target, type, key);
+        each carries a property fingerprint, so unchanged rows are never
+        written and the graph stays queryable throughout. The graph version
+        is bumped only when something changed. A graph written by the old
+        loader (nodes without the lookup label) gets a full reload instead.
+        Returns a dict of change counts, or False on failure.
+        """
         if not self.driver:
-            return {}
+            print("Neo4j driver not available")
+            return False
+        if not os.path.exists(mc1_file_path):
+            print(f"MC1 file not found: {mc1_file_path}")
+            return False
+        batch_size = batch_size or self.batch_size
         try:
-            node_records, _, _ = self.driver.execute_query("""
-                MATCH (n)
-                RETURN labels(n)[0] as label, count(n) as count
-                ORDER BY count DESC
+            print("Applying MC1 delta to Neo4j...")
+            # Nodes from the old loader lack the lookup label, so merging onto it would duplicate them
+            records, _, _ = self.driver.execute_query(f"""
+                MATCH (n) WHERE NOT n:{LOOKUP_LABEL} AND NOT n:{GRAPH_LABEL}
+                WITH n LIMIT 1
+                RETURN count(n) AS legacy
             """)
-            node_stats = [record.data() for record in node_records]
-            rel_records, _, _ = self.driver.execute_query("""
-                MATCH ()-[r]->()
-                RETURN type(r) as type, count(r) as count
-                ORDER BY count DESC
+            if records and records[0]['legacy']:
+                print(f"Graph has nodes without the {LOOKUP_LABEL} label; doing a full reload instead")
+                stats = self.load_mc1_data(mc1_file_path, batch_size, mode='full', workers=workers)
+                if stats:
+                    stats['delta_fallback'] = f'nodes without the {LOOKUP_LABEL} label'
+                return stats
+            previous_version = self.get_graph_version()
+            self.ensure_schema()
+            started = time.time()
+            records, _, _ = self.driver.execute_query(f"""
+                MATCH (n:{LOOKUP_LABEL})
+                RETURN n.id AS id, n.type AS type, n.{FINGERPRINT} AS fingerprint
             """)
-            rel_stats = [record.data() for record in rel_records]
-            total_nodes_records, _, _ = self.driver.execute_query("MATCH (n) RETURN count(n) as count")
-            total_nodes = total_nodes_records[0]['count'] if total_nodes_records else 0
-            total_rels_records, _, _ = self.driver.execute_query("MATCH ()-[r]->() RETURN count(r) as count")
-            total_rels = total_rels_records[0]['count'] if total_rels_records else 0
-            return {
-                'total_nodes': total_nodes,
-                'total_relationships': total_rels,
-                'node_types': node_stats,
-                'relationship_types': rel_stats
+            existing_nodes = {r['id']: (r['fingerprint'], r['type']) for r in records}
+            records, _, _ = self.driver.execute_query(f"""
+                MATCH (a:{LOOKUP_LABEL})-[r]->(b:{LOOKUP_LABEL})
+                RETURN a.id AS source, b.id AS target, type(r) AS type, r.key AS key, r.{FINGERPRINT} AS fingerprint
+            """)
+            existing_links = {(r['source'], r['target'], r['type'], r['key']): r['fingerprint'] for r in records}
+            del records
+            stats = {
+                'mode': 'delta',
+                'nodes_inserted': 0, 'nodes_updated': 0, 'nodes_deleted': 0, 'nodes_unchanged': 0,
+                'relationships_inserted': 0, 'relationships_updated': 0,
+                'relationships_deleted': 0, 'relationships_unchanged': 0,
             }
+            seen_nodes = set()
+            seen_links = set()
+
+            def node_changes():
+                for node in iter_nodes(mc1_file_path):
+                    row = node_row(node)
+                    props = row['properties']
+                    if row['id'] in seen_nodes:
+                        continue
+                    seen_nodes.add(row['id'])
+                    known = existing_nodes.get(row['id'])
+                    if known is not None and known[0] == props[FINGERPRINT]:
+                        stats['nodes_unchanged'] += 1
+                        continue
+                    stats['nodes_updated' if known else 'nodes_inserted'] += 1
+                    label = node_label(props['type'])
+                    previous_label = node_label(known[1]) if known and known[1] else None
+                    yield (label, previous_label), node_upsert_query(label, previous_label), row
+
+            def link_changes():
+                for link in iter_links(mc1_file_path):
+                    rel_type = relationship_type(link.get('type', 'RELATED'))
+                    row = link_row(link)
+                    identity = (row['source'], row['target'], rel_type, row['key'])
+                    # Repeated identities would MERGE onto one relationship; the first one wins
+                    if identity in seen_links:
+                        continue
+                    seen_links.add(identity)
+                    known = existing_links.get(identity)
+                    if known is not None and known == row['properties'][FINGERPRINT]:
+                        stats['relationships_unchanged'] += 1
+                        continue
+                    stats['relationships_updated' if identity in existing_links else 'relationships_inserted'] += 1
+                    yield rel_type, relationship_upsert_query(rel_type), row
+
+            # Upsert nodes first so new links find their endpoints, then prune what disappeared
+            self._write_grouped(node_changes(), batch_size, on_new_group=lambda group: self.ensure_schema([group[0]]))
+            workers = workers or self.load_workers
+            if workers > 1:
+                partitions = []
+                self._write_partitioned(link_changes(), batch_size, workers, partitions)
+                stats['partitions'] = partitions
+            else:
+                self._write_grouped(link_changes(), batch_size)
+
+            def link_deletes():
+                for identity in existing_links:
+                    if identity in seen_links:
+                        continue
+                    source, target, rel_type, key = identity
+                    stats['relationships_deleted'] += 1
+                    yield rel_type, f"""
+                    UNWIND $rows AS row
+                    MATCH (a:{LOOKUP_LABEL} {{id: row.source}})-[r:`{rel_type}`]->(b:{LOOKUP_LABEL} {{id: row.target}})
+                    WHERE coalesce(r.key, -1) = coalesce(row.key, -1)
+                    DELETE r
+                    """, {'source': source, 'target': target, 'key': key}
+
+            def node_deletes():
+                for node_id in existing_nodes:
+                    if node_id not in seen_nodes:
+                        stats['nodes_deleted'] += 1
+                        yield 'delete', f"""
+                        UNWIND $rows AS row
+                        MATCH (n:{LOOKUP_LABEL} {{id: row.id}})
+                        DETACH DELETE n
+                        """, {'id': node_id}
+
+            self._write_grouped(link_deletes(), batch_size)
+            self._write_grouped(node_deletes(), batch_size)
+
+            changed = any(stats[k] for k in stats if k.endswith(('_inserted', '_updated', '_deleted')))
+            if stats['relationships_inserted']:
+                self.ensure_schema(rel_types=self.get_relationship_types())
+            if changed or not previous_version:
+                self._set_graph_version(previous_version + 1, 'delta')
+            stats['graph_version'] = self.graph_version
+            stats['seconds'] = round(time.time() - started, 3)
+            print(f"Applied MC1 delta in {stats['seconds']}s (graph version {self.graph_version}): {stats}")
+            return stats
         except Exception as e:
-            print(f"Error getting graph stats: {e}")
-            return {}
+            print(f"Error applying MC1 delta: {e}")
+            return False
 
-    def get_subgraph(self, limit=100):
-        if not self.driver:
-            return {'nodes': [], 'links': []}
+    def invalidate_caches(self):
+        """Drop cached graph stats, overview and query results after the graph changed"""
+        self._stats_cache = None
+        self._overview_cache = None
+        if self.query_cache:
+            self.query_cache.clear()
+
+    def get_graph_stats(self):
+        """Node/relationship totals and per-label/type counts.
+
+        Served from a cache keyed by graph version for ``stats_ttl`` seconds;
+        loads invalidate it. A refresh is a single round trip that reads the
+        count store (``db.stats.retrieve('GRAPH COUNTS')``). Where that
+        procedure is not permitted, it falls back to the label and type lists
+        plus one ``UNION ALL`` of single-label / single-type counts, which the
+        planner also answers from the count store. While Neo4j is unreachable
+        the in-process graph engine answers.
+        """
+        if not self.online:
+            engine = self.get_graph_engine()
+            return engine.stats() if engine is not None else {}
+        cached = self._stats_cache
+        if cached and cached[0] == self.graph_version and cached[1] > time.time():
+            return cached[2]
+        with self._stats_lock:
+            # Another request may have refreshed while we waited
+            cached = self._stats_cache
+            if cached and cached[0] == self.graph_version and cached[1] > time.time():
+                return cached[2]
+            try:
+                stats = None
+                if self._graph_counts_supported:
+                    try:
+                        stats = self._graph_stats_from_count_store()
+                    except Exception as e:
+                        if isinstance(e, UNAVAILABLE_ERRORS):
+                            raise
+                        print(f"Count store statistics unavailable, using count queries: {e}")
+                        self._graph_counts_supported = False
+                if stats is None:
+                    stats = self._graph_stats_from_query()
+                self._stats_cache = (self.graph_version, time.time() + self.stats_ttl, stats)
+                return stats
+            except Exception as e:
+                print(f"Error getting graph stats: {e}")
+                if self._went_offline(e):
+                    return self.get_graph_stats()
+                return {}
+
+    def _graph_stats_result(self, label_counts, type_counts, total_nodes, total_relationships, version):
+        if version is not None:
+            self.graph_version = version
+        node_stats = sorted(
+            ({'label': label, 'count': count} for label, count in label_counts.items()
+             if label not in (LOOKUP_LABEL, GRAPH_LABEL)),
+            key=lambda item: -item['count']
+        )
+        rel_stats = sorted(
+            ({'type': rel_type, 'count': count} for rel_type, count in type_counts.items()),
+            key=lambda item: -item['count']
+        )
+        return {
+            # Every node but the version singleton, whether or not it carries the lookup label
+            'total_nodes': total_nodes - label_counts.get(GRAPH_LABEL, 0),
+            'total_relationships': total_relationships,
+            'node_types': node_stats,
+            'relationship_types': rel_stats,
+            'graph_version': self.graph_version
+        }
+
+    def _graph_stats_from_count_store(self):
+        records, _, _ = self.driver.execute_query(f"""
+            CALL db.stats.retrieve('GRAPH COUNTS') YIELD data
+            OPTIONAL MATCH (g:{GRAPH_LABEL})
+            RETURN data, g.version AS version
+        """)
+        data = records[0]['data']
+        label_counts = {}
+        total_nodes = 0
+        for entry in data.get('nodes', []):
+            if 'label' in entry:
+                label_counts[entry['label']] = entry['count']
+            else:
+                total_nodes = entry['count']
+        type_counts = {}
+        total_relationships = 0
+        for entry in data.get('relationships', []):
+            # Entries with start/end labels break the same counts down further
+            if 'startLabel' in entry or 'endLabel' in entry:
+                continue
+            if 'relationshipType' in entry:
+                type_counts[entry['relationshipType']] = entry['count']
+            else:
+                total_relationships = entry['count']
+        return self._graph_stats_result(label_counts, type_counts, total_nodes, total_relationships,
+                                        records[0]['version'])
+
+    def _graph_stats_from_query(self):
+        # Static counts (one label or type per branch) are answered from the count store, not by scanning
+        records, _, _ = self.driver.execute_query("""
+            CALL db.labels() YIELD label
+            WITH collect(label) AS labels
+            CALL {
+                CALL db.relationshipTypes() YIELD relationshipType
+                RETURN collect(relationshipType) AS relationship_types
+            }
+            RETURN labels, relationship_types
+        """)
+        labels, rel_types = records[0]['labels'], records[0]['relationship_types']
+        parts = [
+            "MATCH (n) RETURN 'nodes' AS kind, null AS name, count(n) AS count",
+            "MATCH ()-[r]->() RETURN 'relationships' AS kind, null AS name, count(r) AS count",
+            f"MATCH (g:{GRAPH_LABEL}) RETURN 'version' AS kind, null AS name, max(g.version) AS count",
+        ]
+        parts += [f"MATCH (n:`{label}`) RETURN 'label' AS kind, $labels[{i}] AS name, count(n) AS count"
+                  for i, label in enumerate(labels)]
+        parts += [f"MATCH ()-[r:`{rel_type}`]->() RETURN 'type' AS kind, $types[{i}] AS name, count(r) AS count"
+                  for i, rel_type in enumerate(rel_types)]
+        records, _, _ = self.driver.execute_query(' UNION ALL '.join(parts), labels=labels, types=rel_types)
+        totals, label_counts, type_counts = {}, {}, {}
+        for record in records:
+            if record['kind'] == 'label':
+                label_counts[record['name']] = record['count']
+            elif record['kind'] == 'type':
+                type_counts[record['name']] = record['count']
+            else:
+                totals[record['kind']] = record['count']
+        return self._graph_stats_result(label_counts, type_counts, totals.get('nodes') or 0,
+                                        totals.get('relationships') or 0, totals.get('version'))
+
+    @property
+    def online(self):
+        """Whether reads go to Neo4j: connected, and not inside an outage back-off"""
+        return self.driver is not None and time.time() >= self._offline_until
+
+    def _went_offline(self, error):
+        """Start an ``offline_retry`` back-off if ``error`` means the server is unreachable"""
+        if not isinstance(error, UNAVAILABLE_ERRORS):
+            return False
+        self._offline_until = time.time() + self.offline_retry
+        print(f"Neo4j unreachable, serving reads from the in-process graph for {self.offline_retry}s")
+        return True
+
+    def _read_source(self):
+        """``(engine, cache version)``: the engine is ``None`` while Neo4j is reachable"""
+        if self.online:
+            return None, self.graph_version
+        engine = self.get_graph_engine()
+        return engine, ('engine', self._graph_engine[0]) if engine is not None else None
+
+    def get_subgraph(self, limit=100, mode='first', seed=0):
+        """Directed sample of at most ``limit`` links with their endpoints.
+
+        ``mode`` picks the sample (see ``SAMPLING_MODES``): ``'first'`` takes
+        links in scan order, ``'label'`` one link from each of an even share of
+        nodes per label, ``'relationship'`` an even share of links per type
+        (both sized from the cached graph stats) and ``'random'`` a random
+        sample reproducible for a given ``seed``. Samples are cached per graph
+        version.
+        """
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"mode must be one of {', '.join(SAMPLING_MODES)}")
+        limit = max(0, int(limit))
+        return self._cached_read(
+            ('subgraph', limit, mode, seed if mode == 'random' else None),
+            lambda engine: engine.subgraph(limit, mode, seed),
+            lambda: self._subgraph_from_neo4j(limit, mode, seed),
+            {'nodes': [], 'links': []}
+        )
+
+    def _subgraph_from_neo4j(self, limit, mode, seed):
+        if mode == 'first':
+            sample = f"""
+                MATCH (:{LOOKUP_LABEL})-[r]->(:{LOOKUP_LABEL})
+                RETURN r LIMIT $limit
+            """
+        elif mode == 'random':
+            sample = f"""
+                MATCH (:{LOOKUP_LABEL})-[r]->(:{LOOKUP_LABEL})
+                RETURN r ORDER BY {RANDOM_ORDER} LIMIT $limit
+            """
+        else:
+            stats = self.get_graph_stats()
+            if mode == 'label':
+                quotas = stratified_quotas({t['label']: t['count'] for t in stats.get('node_types', [])}, limit)
+                # One link per node spreads each stratum over many nodes instead of one hub
+                parts = [f"""
+                    MATCH (n:`{label}`)
+                    CALL {{ WITH n MATCH (n)-[r]-(:{LOOKUP_LABEL}) RETURN r LIMIT 1 }}
+                    RETURN r LIMIT {quota}
+                """ for label, quota in quotas.items()]
+            else:
+                quotas = stratified_quotas({t['type']: t['count'] for t in stats.get('relationship_types', [])}, limit)
+                parts = [f"""
+                    MATCH ()-[r:`{rel_type}`]->()
+                    RETURN r LIMIT {quota}
+                """ for rel_type, quota in quotas.items()]
+            if not parts:
+                return {'nodes': [], 'links': []}
+            sample = ' UNION ALL '.join(parts)
+        return self._links_payload(sample, limit=limit, seed=int(seed) % 2 ** 31)
+
+    def _links_payload(self, sample, **params):
+        """Subgraph payload for the relationships ``r`` returned by the ``sample`` subquery"""
+        records, _, _ = self.driver.execute_query(f"""
+            CALL {{ {sample} }}
+            RETURN elementId(r) AS rid, properties(startNode(r)) AS source, properties(endNode(r)) AS target,
+                   type(r) AS type, properties(r) AS properties
+        """, **params)
+        nodes, links = {}, {}
+        for record in records:
+            if record['rid'] in links:
+                continue
+            source, target = record['source'], record['target']
+            for properties in (source, target):
+                if properties['id'] not in nodes:
+                    nodes[properties['id']] = view_node(properties)
+            links[record['rid']] = view_link(source['id'], target['id'], record['type'], record['properties'])
+        return {'nodes': list(nodes.values()), 'links': list(links.values())}
+
+    def _cached_read(self, key, read_engine, read_neo4j, empty):
+        """Serve ``key`` from the query cache, else from the engine or Neo4j, caching the result"""
+        engine, version = self._read_source()
+        if engine is None and not self.online:
+            return empty
+        cached = self.query_cache.get(key, version) if self.query_cache else None
+        if cached is not None:
+            return cached
+        try:
+            result = read_engine(engine) if engine is not None else read_neo4j()
+        except Exception as e:
+            print(f"Error reading {key[0]}: {e}")
+            if engine is None and self._went_offline(e):
+                return self._cached_read(key, read_engine, read_neo4j, empty)
+            return dict(empty, error=str(e))
+        if self.query_cache:
+            self.query_cache.put(key, version, result, len(json.dumps(result, default=str)))
+        return result
+
+    def _dated_types(self, rel_types=None):
+        types = [t['type'] for t in self.get_graph_stats().get('relationship_types', [])]
+        return [t for t in types if t in rel_types] if rel_types else types
+
+    def get_time_window(self, start=None, end=None, limit=500, rel_types=None):
+        """Links dated within ``start``..``end`` (inclusive ISO dates), earliest first, with their endpoints.
+
+        Each relationship type is a ``date_added`` range-index seek; at most
+        ``limit`` links are returned and ``truncated`` reports whether more
+        matched.
+        """
+        window = time_window(start, end)
+        rel_types = sorted(set(rel_types)) if rel_types else None
+        limit = max(0, int(limit))
+
+        def read_neo4j():
+            predicate = date_range_predicate(*window)
+            parts = [f"""
+                MATCH ()-[r:`{rel_type}`]->() WHERE {predicate}
+                RETURN r ORDER BY r.date_added LIMIT $limit
+            """ for rel_type in self._dated_types(rel_types)]
+            if not parts:
+                return {'nodes': [], 'links': [], 'truncated': False}
+            sample = f"CALL {{ {' UNION ALL '.join(parts)} }} WITH r ORDER BY r.date_added LIMIT $limit RETURN r"
+            # One extra row tells whether the window holds more than ``limit`` links
+            result = self._links_payload(sample, start=window[0], end=window[1], limit=limit + 1)
+            result['truncated'] = len(result['links']) > limit
+            if result['truncated']:
+                result['links'].pop()
+                endpoints = {node_id for link in result['links'] for node_id in (link['source'], link['target'])}
+                result['nodes'] = [node for node in result['nodes'] if node['id'] in endpoints]
+            return result
+
+        return self._cached_read(
+            ('time-window', window, limit, tuple(rel_types or ())),
+            lambda engine: engine.time_window(*window, limit=limit, rel_types=rel_types),
+            read_neo4j, {'nodes': [], 'links': [], 'truncated': False}
+        )
+
+    def get_temporal_aggregate(self, start=None, end=None, bucket='month', rel_types=None):
+        """Link counts per time bucket and relationship type within ``start``..``end``.
+
+        ``bucket`` is one of ``TIME_BUCKETS``. Counting runs in the database
+        over ``date_added`` range-index seeks, one per relationship type.
+        """
+        if bucket not in TIME_BUCKETS:
+            raise ValueError(f"bucket must be one of {', '.join(TIME_BUCKETS)}")
+        window = time_window(start, end)
+        rel_types = sorted(set(rel_types)) if rel_types else None
+
+        def read_neo4j():
+            predicate = date_range_predicate(*window)
+            parts = [f"MATCH ()-[r:`{rel_type}`]->() WHERE {predicate} RETURN r"
+                     for rel_type in self._dated_types(rel_types)]
+            rows = []
+            if parts:
+                rows, _, _ = self.driver.execute_query(f"""
+                    CALL {{ {' UNION ALL '.join(parts)} }}
+                    WITH {TIME_BUCKETS[bucket]} AS bucket, type(r) AS type, count(*) AS count
+                    RETURN bucket, type, count
+                """, start=window[0], end=window[1])
+            buckets = defaultdict(dict)
+            for row in rows:
+                buckets[row['bucket']][row['type']] = row['count']
+            return temporal_buckets(bucket, window, buckets)
+
+        return self._cached_read(
+            ('temporal', window, bucket, tuple(rel_types or ())),
+            lambda engine: engine.temporal_aggregate(*window, bucket=bucket, rel_types=rel_types),
+            read_neo4j, temporal_buckets(bucket, window, {})
+        )
+
+    def get_neighborhood(self, node_id, hops=1, labels=None, rel_types=None, fanout=50, max_nodes=None):
+        """Deduplicated nodes and links within ``hops`` of ``node_id``.
+
+        A BFS that follows links in either direction, restricted to
+        ``rel_types`` and to neighbours carrying one of ``labels``. Each
+        expanded node contributes at most ``fanout`` links and the result holds
+        at most ``max_nodes`` nodes; ``truncated`` reports whether a cap cut
+        it short. Results for hot seeds are served from the query cache.
+        Returns ``None`` when the seed does not exist.
+        """
+        hops = max(1, min(int(hops), MAX_HOPS))
+        labels = sorted(set(labels)) if labels else None
+        rel_types = sorted(set(rel_types)) if rel_types else None
+        max_nodes = min(max_nodes or self.neighborhood_max_nodes, self.neighborhood_max_nodes)
+        engine, version = self._read_source()
+        if engine is None and not self.online:
+            return None
+        key = ('neighborhood', node_id, hops, tuple(labels or ()), tuple(rel_types or ()), fanout, max_nodes)
+        cached = self.query_cache.get(key, version) if self.query_cache else None
+        if cached is not None:
+            return dict(cached, cached=True)
         try:
+            if engine is not None:
+                result = engine.neighborhood(node_id, hops, labels, rel_types, fanout, max_nodes)
+            else:
+                result = self._neighborhood_from_neo4j(node_id, hops, labels, rel_types, fanout, max_nodes)
+        except Exception as e:
+            print(f"Error expanding neighborhood: {e}")
+            if engine is None and self._went_offline(e):
+                return self.get_neighborhood(node_id, hops, labels, rel_types, fanout, max_nodes)
+            return {'nodes': [], 'links': [], 'truncated': False, 'error': str(e)}
+        if result is not None and self.query_cache:
+            self.query_cache.put(key, version, result, len(json.dumps(result, default=str)))
+        return result
+
+    def _neighborhood_from_neo4j(self, node_id, hops, labels, rel_types, fanout, max_nodes):
+        records, _, _ = self.driver.execute_query(
+            f"MATCH (n:{LOOKUP_LABEL} {{id: $id}}) RETURN properties(n) AS properties", id=node_id
+        )
+        if not records:
+            return None
+        nodes = {node_id: view_node(records[0]['properties'])}
+        links = {}
+        frontier, truncated = [node_id], False
+        for _ in range(hops):
+            # One round trip per hop; one extra row per node tells whether fanout cut it
             records, _, _ = self.driver.execute_query(f"""
-                MATCH (n)-[r]-(m)
-                RETURN n, r, m
-                LIMIT {limit}
-            """)
-            nodes = {}
-            links = []
+                UNWIND $frontier AS id
+                MATCH (n:{LOOKUP_LABEL} {{id: id}})
+                CALL {{
+                    WITH n
+                    MATCH (n)-[r]-(m:{LOOKUP_LABEL})
+                    WHERE ($rel_types IS NULL OR type(r) IN $rel_types)
+                      AND ($labels IS NULL OR any(label IN labels(m) WHERE label IN $labels))
+                    RETURN r, m
+                    LIMIT $row_limit
+                }}
+                RETURN id AS expanded, elementId(r) AS rid, startNode(r).id AS source, endNode(r).id AS target,
+                       type(r) AS type, properties(r) AS properties, properties(m) AS neighbor
+            """, frontier=frontier, rel_types=rel_types, labels=labels,
+                row_limit=fanout + 1 if fanout else 2 ** 31 - 1)
+            next_frontier, per_node = [], defaultdict(int)
             for record in records:
-                d = record.data()
-                n = d['n']
-                m = d['m']
-                r = d['r']
-                sid = n['id']
-                if sid not in nodes:
-                    nodes[sid] = {
-                        'id': sid,
-                        'type': n.get('type', 'Unknown'),
-                        'country': n.get('country'),
-                        'group': self._get_node_group(n.get('type', 'Unknown'))
-                    }
-                tid = m['id']
-                if tid not in nodes:
-                    nodes[tid] = {
-                        'id': tid,
-                        'type': m.get('type', 'Unknown'),
-                        'country': m.get('country'),
-                        'group': self._get_node_group(m.get('type', 'Unknown'))
-                    }
-                links.append({
-                    'source': sid,
-                    'target': tid,
-                    'type': getattr(r, 'type', 'RELATED'),
-                    'algorithm': getattr(r, 'algorithm', None),
-                    'raw_source': getattr(r, 'raw_source', None),
-                    'date_added': getattr(r, 'date_added', None),
-                    'last_edited_by': getattr(r, 'last_edited_by', None)
-                })
-            return { 'nodes': list(nodes.values()), 'links': links }
-        except Exception as e:
-            print(f"Error getting subgraph: {e}")
-            return {'nodes': [], 'links': []}
+                per_node[record['expanded']] += 1
+                if fanout and per_node[record['expanded']] > fanout:
+                    truncated = True
+                    continue
+                if record['rid'] in links:
+                    continue
+                neighbor = record['neighbor']
+                if neighbor['id'] not in nodes:
+                    if len(nodes) >= max_nodes:
+                        truncated = True
+                        continue
+                    nodes[neighbor['id']] = view_node(neighbor)
+                    next_frontier.append(neighbor['id'])
+                links[record['rid']] = view_link(record['source'], record['target'], record['type'],
+                                                 record['properties'])
+            frontier = next_frontier
+            if not frontier or len(nodes) >= max_nodes:
+                break
+        return {'nodes': list(nodes.values()), 'links': list(links.values()), 'truncated': truncated}
 
     def _get_node_group(self, node_type):
-        type_groups = {
-            'FishingCompany': 1,
-            'LogisticsCompany': 2,
-            'NewsSource': 3,
-            'Person': 4,
-            'Location': 5,
-            'Organization': 6
-        }
-        for key, group in type_groups.items():
-            if key in node_type:
-                return group
-        return 0
+        return node_group(node_type)
 
     def search_entities(self, query, limit=20):
-        if not self.driver:
+        """Ranked entity search with prefix and fuzzy matching.
+
+        Uses the ``mc1_entity_search`` full-text index; when Neo4j or the
+        index is unavailable it falls back to the in-process graph engine's
+        ``EntityIndex``.
+        """
+        lucene = lucene_query(query)
+        if not lucene:
             return []
+        if self.online:
+            try:
+                records, _, _ = self.driver.execute_query(f"""
+                    CALL db.index.fulltext.queryNodes('{SEARCH_INDEX}', $lucene)
+                    YIELD node, score
+                    RETURN node.id AS id, node.type AS type, node.country AS country, score
+                    LIMIT $limit
+                """, lucene=lucene, limit=limit)
+                return [
+                    {'id': r['id'], 'type': r['type'] or 'Unknown', 'country': r['country'], 'score': round(r['score'], 4)}
+                    for r in records
+                ]
+            except Exception as e:
+                print(f"Full-text search unavailable, using in-process index: {e}")
+                self._went_offline(e)
+        engine = self.get_graph_engine()
+        return engine.search(query, limit) if engine is not None else []
+
+    def get_graph_engine(self):
+        """In-process ``GraphEngine`` over the MC1 file, rebuilt when the file changes.
+
+        Serves stats, subgraphs, overview, search, neighbourhoods and time
+        queries while Neo4j is unreachable.
+        """
         try:
-            records, _, _ = self.driver.execute_query("""
-                MATCH (n)
-                WHERE toLower(n.id) CONTAINS toLower($query)
-                RETURN n
-                LIMIT $limit
-            """, query=query, limit=limit)
-            entities = []
-            for record in records:
-                node = record.data()['n']
-                entities.append({'id': node['id'], 'type': node.get('type', 'Unknown'), 'country': node.get('country')})
-            return entities
-        except Exception as e:
-            print(f"Error searching entities: {e}")
-            return []
+            mtime = os.stat(self.mc1_path).st_mtime_ns
+        except OSError:
+            return None
+        with self._graph_engine_lock:
+            if self._graph_engine is None or self._graph_engine[0] != mtime:
+                started = time.time()
+                engine = GraphEngine.from_mc1(self.mc1_path)
+                self._graph_engine = (mtime, engine)
+                print(f"Built in-process graph over {len(engine)} nodes and {engine.link_count} links "
+                      f"in {time.time() - started:.2f}s")
+            return self._graph_engine[1]
+
+    def shared_graph_engine(self):
+        """The in-process engine if Neo4j is unreachable (it is kept anyway), else ``None``"""
+        return None if self.online else self.get_graph_engine()
 
     def get_node_labels(self):
         """Get all node labels in the database"""
@@ -235,7 +1061,7 @@ class Neo4jManager:
             return []
         try:
             records, _, _ = self.driver.execute_query("CALL db.labels()")
-            return [record['label'] for record in records]
+            return [record['label'] for record in records if record['label'] not in (LOOKUP_LABEL, GRAPH_LABEL)]
         except Exception as e:
             print(f"Error getting node labels: {e}")
             return []
@@ -263,243 +1089,175 @@ class Neo4jManager:
                 node_data = record['n']
                 nodes.append({
                     'id': node_data.element_id,
-                    'properties': dict(node_data)
+                    'properties': public_properties(node_data)
                 })
             return nodes
         except Exception as e:
             print(f"Error getting sample nodes for {label}: {e}")
             return []
 
-    def execute_query(self, query):
-        """Execute a custom Cypher query and return results"""
+    def get_graph_overview(self, sample_size=20):
+        """Labels, relationship types and up to ``sample_size`` nodes per label.
+
+        Two round trips: one for the label and type lists, then one
+        ``UNION ALL`` of label-scoped samples so every branch is a label scan.
+        Cached per graph version for ``stats_ttl`` seconds.
+        """
+        overview = {'labels': [], 'relationshipTypes': [], 'nodes': {}}
+        if not self.online:
+            engine = self.get_graph_engine()
+            return engine.overview(sample_size) if engine is not None else overview
+        cached = self._overview_cache
+        if cached and cached[:2] == (self.graph_version, sample_size) and cached[2] > time.time():
+            return cached[3]
+        try:
+            version = self.graph_version
+            records, _, _ = self.driver.execute_query(f"""
+                CALL db.labels() YIELD label
+                WITH [l IN collect(label) WHERE NOT l IN ['{LOOKUP_LABEL}', '{GRAPH_LABEL}']] AS labels
+                CALL {{
+                    CALL db.relationshipTypes() YIELD relationshipType
+                    RETURN collect(relationshipType) AS relationship_types
+                }}
+                RETURN labels, relationship_types
+            """)
+            labels = records[0]['labels']
+            overview['labels'] = labels
+            overview['relationshipTypes'] = records[0]['relationship_types']
+            samples = []
+            if labels:
+                parts = [f"""
+                    MATCH (n:`{label}`)
+                    WITH n LIMIT $sample_size
+                    RETURN $labels[{i}] AS label, collect(n) AS sample
+                """ for i, label in enumerate(labels)]
+                samples, _, _ = self.driver.execute_query(
+                    ' UNION ALL '.join(parts), sample_size=sample_size, labels=labels
+                )
+            serializer = GraphSerializer()
+            for record in samples:
+                overview['nodes'][record['label']] = [
+                    {'id': node['identity'], 'properties': node['properties']}
+                    for node in map(serializer.node, record['sample'])
+                ]
+            self._overview_cache = (version, sample_size, time.time() + self.stats_ttl, overview)
+        except Exception as e:
+            print(f"Error getting graph overview: {e}")
+            if self._went_offline(e):
+                return self.get_graph_overview(sample_size)
+        return overview
+
+    def execute_query(self, query, format='records', params=None):
+        """Execute a custom Cypher query and return serialized results.
+
+        ``format='graph'`` returns deduplicated ``nodes`` / ``relationships``
+        maps keyed by element id, with rows referencing them (see
+        ``neo4j_serializer``); ``'records'`` keeps the legacy nested rows.
+        See ``execute_query_json`` for caching.
+        """
+        return json.loads(self.execute_query_json(query, format, params))
+
+    def execute_query_json(self, query, format='records', params=None):
+        """``execute_query`` as the JSON response body, serialized exactly once.
+
+        Read-only, deterministic results are cached as that text per graph
+        version (see ``query_cache``), so its length is the entry size. Any
+        query that writes bumps the stored graph version, so other processes
+        drop their cached reads once they see it, and the cache TTL bounds how
+        long they can serve them before that.
+        """
         if not self.driver:
-            return {'records': [], 'summary': None}
-        
+            return json.dumps({'records': [], 'summary': None})
+        key = cache_key(query, params, format)
+        version = self.graph_version
+        cacheable = self.query_cache is not None and is_deterministic(query)
+        cached = self.query_cache.get(key, version) if cacheable else None
+        if cached is not None:
+            return cached[:-1] + ', "cached": true}'
         try:
-            print(f"Executing query: {query}")
-            records, summary, keys = self.driver.execute_query(query)
-            
-            print(f"Query returned {len(records)} records with keys: {keys}")
-            
-            result_records = []
-            for i, record in enumerate(records):
-                record_dict = {}
-                for key in keys:
-                    value = record[key]
-                    # Debug: print the type of value before serialization
-                    if i < 3:  # Only print first 3 to avoid spam
-                        print(f"Record {i}, key '{key}': type={type(value)}, class={value.__class__.__name__ if hasattr(value, '__class__') else 'unknown'}")
-                        if hasattr(value, '__dict__'):
-                            print(f"  Object attributes: {[attr for attr in dir(value) if not attr.startswith('_')][:10]}")
-                    
-                    # Convert Neo4j objects to serializable format
-                    serialized = self._serialize_neo4j_object(value)
-                    
-                    if i < 3:
-                        print(f"  Serialized to: {type(serialized)}, keys={serialized.keys() if isinstance(serialized, dict) else 'not a dict'}")
-                    
-                    record_dict[key] = serialized
-                result_records.append(record_dict)
-            
-            print(f"Successfully serialized {len(result_records)} records")
-            
-            return {
-                'records': result_records,
-                'summary': {
-                    'query_type': summary.query_type if hasattr(summary, 'query_type') else None,
-                    'counters': self._extract_counters(summary.counters) if hasattr(summary, 'counters') else {}
-                }
+            records, summary, keys = self.driver.execute_query(query, parameters_=params)
+            serializer = GraphSerializer(dedup=format == 'graph')
+            result = serializer.payload([serializer.record(record, keys) for record in records])
+            result['summary'] = {
+                'query_type': summary.query_type if hasattr(summary, 'query_type') else None,
+                'counters': self._extract_counters(summary.counters) if hasattr(summary, 'counters') else {}
             }
+            body = json.dumps(result, default=str)
+            # The planner's classification of the executed query decides cacheability
+            if result['summary']['query_type'] != 'r':
+                self._bump_graph_version()
+            elif cacheable:
+                self.query_cache.put(key, version, body, len(body))
+            return body
         except Exception as e:
             print(f"Error executing query: {e}")
-            import traceback
-            traceback.print_exc()
-            return {'records': [], 'error': str(e)}
+            return json.dumps({'records': [], 'error': str(e)})
 
-    def _serialize_neo4j_object(self, obj):
-        """Convert Neo4j objects to serializable format"""
+    def _bump_graph_version(self):
+        """Record a change made by a custom query and drop every cached read"""
         try:
-            def make_json_safe(value):
-                # Recursively convert unknown/complex types to JSON-safe structures
-                if value is None or isinstance(value, (str, int, float, bool)):
-                    return value
-                if isinstance(value, list):
-                    return [make_json_safe(v) for v in value]
-                if isinstance(value, dict):
-                    return {k: make_json_safe(v) for k, v in value.items()}
-                # Neo4j specific numeric wrappers
-                if hasattr(value, 'toNumber') and callable(getattr(value, 'toNumber')):
-                    try:
-                        return value.toNumber()
-                    except Exception:
-                        return str(value)
-                # Fallback to string for unknown types (e.g., abc.OverFishing)
-                return str(value)
-
-            # Handle None
-            if obj is None:
-                return None
-            
-            # Handle basic types
-            if isinstance(obj, (str, int, float, bool)):
-                return obj
-            
-            # Handle lists first to avoid recursion issues
-            if isinstance(obj, list):
-                return [self._serialize_neo4j_object(item) for item in obj]
-            
-            # Check if it's a Neo4j Path object by checking for common Path attributes
-            # Neo4j Path objects have 'nodes' and 'relationships' attributes
-            if hasattr(obj, '__class__') and 'Path' in obj.__class__.__name__:
-                print(f"Serializing Neo4j Path object: {obj.__class__.__name__}")
-                segments = []
-                
-                # Build segments from nodes and relationships
-                if hasattr(obj, 'nodes') and hasattr(obj, 'relationships'):
-                    nodes = list(obj.nodes)
-                    relationships = list(obj.relationships)
-                    
-                    # Create segments from alternating nodes and relationships
-                    for i in range(len(relationships)):
-                        segments.append({
-                            'start': self._serialize_node(nodes[i]),
-                            'end': self._serialize_node(nodes[i + 1]),
-                            'relationship': self._serialize_relationship(relationships[i])
-                        })
-                    
-                    return {
-                        'segments': segments,
-                        'nodes': [self._serialize_node(node) for node in nodes],
-                        'relationships': [self._serialize_relationship(rel) for rel in relationships]
-                    }
-            
-            # Handle Neo4j Node objects
-            if hasattr(obj, '__class__') and 'Node' in obj.__class__.__name__:
-                return self._serialize_node(obj)
-            
-            # Handle Neo4j Relationship objects  
-            if hasattr(obj, '__class__') and 'Relationship' in obj.__class__.__name__:
-                return self._serialize_relationship(obj)
-            
-            # Handle dictionaries
-            if isinstance(obj, dict):
-                return {k: self._serialize_neo4j_object(v) for k, v in obj.items()}
-            
-            # Try to check for Path-like structure
-            if hasattr(obj, 'segments'):
-                print("Found object with segments attribute")
-                return {
-                    'segments': [
-                        {
-                            'start': self._serialize_node(segment.start) if hasattr(segment, 'start') else None,
-                            'end': self._serialize_node(segment.end) if hasattr(segment, 'end') else None,
-                            'relationship': self._serialize_relationship(segment.relationship) if hasattr(segment, 'relationship') else None
-                        }
-                        for segment in obj.segments
-                    ] if hasattr(obj, 'segments') else [],
-                    'nodes': [self._serialize_node(node) for node in obj.nodes] if hasattr(obj, 'nodes') else [],
-                    'relationships': [self._serialize_relationship(rel) for rel in obj.relationships] if hasattr(obj, 'relationships') else []
-                }
-            
-            # Fallback: stringify unknown types without noisy logging
-            if hasattr(obj, '__dict__'):
-                # Convert attributes to safe values
-                return {k: make_json_safe(v) for k, v in obj.__dict__.items() if not k.startswith('_')}
-            return make_json_safe(obj)
-            
+            self._set_graph_version(self.get_graph_version() + 1, 'query')
         except Exception as e:
-            print(f"Error serializing Neo4j object: {e}, type: {type(obj)}")
-            import traceback
-            traceback.print_exc()
-            return str(obj)
-    
-    def _serialize_node(self, node):
-        """Serialize a Neo4j Node object (driver v5 safe)"""
-        try:
-            # Prefer element_id; fall back to identity or string
-            identity = getattr(node, 'element_id', None)
-            if identity is None and hasattr(node, 'identity'):
-                ident = getattr(node, 'identity')
-                identity = ident.toNumber() if hasattr(ident, 'toNumber') else str(ident)
-            if identity is None:
-                identity = str(node)
-
-            # Extract labels and properties defensively
-            labels = list(getattr(node, 'labels', [])) if hasattr(node, 'labels') else []
-            def make_json_safe(value):
-                if value is None or isinstance(value, (str, int, float, bool)):
-                    return value
-                if isinstance(value, list):
-                    return [make_json_safe(v) for v in value]
-                if isinstance(value, dict):
-                    return {k: make_json_safe(v) for k, v in value.items()}
-                if hasattr(value, 'toNumber') and callable(getattr(value, 'toNumber')):
-                    try:
-                        return value.toNumber()
-                    except Exception:
-                        return str(value)
-                return str(value)
+            print(f"Error bumping graph version: {e}")
+            self.invalidate_caches()
 
-            try:
-                properties = {k: make_json_safe(v) for k, v in dict(node).items()}
-            except Exception:
-                raw_props = dict(getattr(node, 'properties', {})) if hasattr(node, 'properties') else {}
-                properties = {k: make_json_safe(v) for k, v in raw_props.items()}
+    def stream_query(self, query, format='records', row_limit=None, chunk_rows=100, params=None):
+        """Run a custom Cypher query and yield NDJSON text chunks as records arrive.
 
-            return {
-                'identity': identity,
-                'labels': labels,
-                'properties': properties
-            }
-        except Exception as e:
-            print(f"Error serializing node: {e}")
-            return {'identity': str(node), 'labels': [], 'properties': {}}
-    
-    def _serialize_relationship(self, rel):
-        """Serialize a Neo4j Relationship object (driver v5 safe)"""
+        Records are pulled lazily from a session (``stream_fetch_size`` at a
+        time) under a server-side ``query_timeout``. Lines are ``header``
+        (keys), ``record`` rows, and in ``graph`` format ``node`` /
+        ``relationship`` lines emitted once, before the first row that
+        references them; a final ``summary`` line reports the row count and
+        whether ``row_limit`` (capped at ``stream_row_limit``) cut it short.
+        Failures are reported as an ``error`` line.
+        """
+        if not self.driver:
+            yield json.dumps({'type': 'error', 'error': 'Neo4j driver not available'}) + '\n'
+            return
+        row_limit = min(row_limit or self.stream_row_limit, self.stream_row_limit)
+        serializer = GraphSerializer(dedup=format == 'graph')
+        rows = 0
+        truncated = False
         try:
-            identity = getattr(rel, 'element_id', None)
-            if identity is None and hasattr(rel, 'identity'):
-                ident = getattr(rel, 'identity')
-                identity = ident.toNumber() if hasattr(ident, 'toNumber') else str(ident)
-
-            rel_type = getattr(rel, 'type', 'UNKNOWN')
-            def make_json_safe(value):
-                if value is None or isinstance(value, (str, int, float, bool)):
-                    return value
-                if isinstance(value, list):
-                    return [make_json_safe(v) for v in value]
-                if isinstance(value, dict):
-                    return {k: make_json_safe(v) for k, v in value.items()}
-                if hasattr(value, 'toNumber') and callable(getattr(value, 'toNumber')):
-                    try:
-                        return value.toNumber()
-                    except Exception:
-                        return str(value)
-                return str(value)
-
-            try:
-                properties = {k: make_json_safe(v) for k, v in dict(rel).items()}
-            except Exception:
-                raw_props = dict(getattr(rel, 'properties', {})) if hasattr(rel, 'properties') else {}
-                properties = {k: make_json_safe(v) for k, v in raw_props.items()}
-
-            # Start/end node ids are not required by frontend, keep if available
-            start_node = getattr(rel, 'start_node', None)
-            end_node = getattr(rel, 'end_node', None)
-            start_id = getattr(start_node, 'element_id', None) if start_node is not None else None
-            end_id = getattr(end_node, 'element_id', None) if end_node is not None else None
-
-            return {
-                'identity': identity if identity is not None else str(rel),
-                'type': rel_type,
-                'properties': properties,
-                'start_node': start_id,
-                'end_node': end_id
-            }
+            with self.driver.session(fetch_size=self.stream_fetch_size) as session:
+                result = session.run(Query(query, timeout=self.query_timeout), params)
+                keys = result.keys()
+                yield json.dumps({'type': 'header', 'keys': keys, 'format': format, 'row_limit': row_limit}) + '\n'
+                lines = []
+                for record in result:
+                    if rows >= row_limit:
+                        truncated = True
+                        break
+                    row = serializer.record(record, keys)
+                    if serializer.dedup:
+                        nodes, relationships = serializer.drain()
+                        lines.extend(json.dumps({'type': 'node', 'node': n}) for n in nodes)
+                        lines.extend(json.dumps({'type': 'relationship', 'relationship': r}) for r in relationships)
+                    lines.append(json.dumps({'type': 'record', 'record': row}))
+                    rows += 1
+                    if rows % chunk_rows == 0:
+                        yield '\n'.join(lines) + '\n'
+                        lines = []
+                        serializer.forget()
+                if lines:
+                    yield '\n'.join(lines) + '\n'
+                # Discards anything left unread once the cap was hit
+                summary = result.consume()
+            if summary.query_type != 'r':
+                self._bump_graph_version()
+            yield json.dumps({
+                'type': 'summary',
+                'rows': rows,
+                'truncated': truncated,
+                'summary': {
+                    'query_type': summary.query_type,
+                    'counters': self._extract_counters(summary.counters)
+                }
+            }) + '\n'
         except Exception as e:
-            print(f"Error serializing relationship: {e}")
-            return {'identity': str(rel), 'type': 'UNKNOWN', 'properties': {}}
+            print(f"Error streaming query: {e}")
+            yield json.dumps({'type': 'error', 'error': str(e), 'rows': rows}) + '\n'
 
     def _extract_counters(self, counters):
         """Safely extract counters from Neo4j SummaryCounters object"""
@@ -519,15 +1277,16 @@ class Neo4jManager:
             print(f"Error extracting counters: {e}")
             return {}
 
-    def load_mc1_data_default(self):
+    def load_mc1_data_default(self, mode='full'):
         """Load MC1 data from the default file location"""
-        mc1_file_path = os.path.join(os.path.dirname(__file__), '..', 'mc1.json')
-        if self.load_mc1_data(mc1_file_path):
+        load = self.load_mc1_data(self.mc1_path, mode=mode)
+        if load:
             stats = self.get_graph_stats()
             return {
                 'success': True,
                 'message': 'MC1 data loaded successfully',
-                'stats': stats
+                'stats': stats,
+                'load': load
             }
         else:
             return {
@@ -1,6 +1,8 @@
 import os
 import json
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, Response, jsonify, request, current_app, stream_with_context
+
+from neo4j_serializer import FORMATS
 
 neo4j_bp = Blueprint('neo4j', __name__)
 
@@ -22,14 +24,14 @@ def neo4j_status():
     """Check Neo4j connection status"""
     try:
         neo4j_manager = get_neo4j_manager()
-        if neo4j_manager and neo4j_manager.driver:
-            # Test connection
-            with neo4j_manager.driver.session() as session:
-                result = session.run("RETURN 1 as test")
-                result.single()
-            
-            # Get basic stats
+        if neo4j_manager and neo4j_manager.online:
+            # Cached stats double as the connectivity check
             stats = neo4j_manager.get_graph_stats()
+            if not stats or not neo4j_manager.online:
+                return jsonify({
+                    'connected': False,
+                    'message': 'Connection failed: could not read graph statistics'
+                })
             return jsonify({
                 'connected': True,
                 'message': 'Connected to Neo4j',
@@ -54,23 +56,9 @@ def get_graph_data():
         if not neo4j_manager:
             return jsonify({'error': 'Neo4j not configured'}), 500
         
-        # Get labels (node types)
-        labels = neo4j_manager.get_node_labels()
-        
-        # Get relationship types
-        relationship_types = neo4j_manager.get_relationship_types()
-        
-        # Get sample nodes for each label
-        nodes = {}
-        for label in labels:
-            sample_nodes = neo4j_manager.get_sample_nodes(label, limit=20)
-            nodes[label] = sample_nodes
-        
-        return jsonify({
-            'labels': labels,
-            'relationshipTypes': relationship_types,
-            'nodes': nodes
-        })
+        # Labels, relationship types and per-label samples in one cached query
+        overview = neo4j_manager.get_graph_overview(sample_size=int(request.args.get('samples', 20)))
+        return jsonify(overview)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -84,13 +72,24 @@ def execute_neo4j_query():
         
         data = request.get_json()
         query = data.get('query', '')
+        result_format = data.get('format', 'records')
         
         if not query:
             return jsonify({'error': 'No query provided'}), 400
+        if result_format not in FORMATS:
+            return jsonify({'error': f"format must be one of {', '.join(FORMATS)}"}), 400
         
-        # Execute query
-        results = neo4j_manager.execute_query(query)
-        return jsonify(results)
+        # Stream NDJSON so clients can render before the whole result arrives
+        if data.get('stream'):
+            limit = data.get('limit')
+            chunks = neo4j_manager.stream_query(query, format=result_format, row_limit=int(limit) if limit else None,
+                                                params=data.get('params'))
+            return Response(stream_with_context(chunks), mimetype='application/x-ndjson',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        
+        # Execute query; the manager returns (and caches) the serialized body
+        body = neo4j_manager.execute_query_json(query, format=result_format, params=data.get('params'))
+        return Response(body, mimetype='application/json')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -103,8 +102,12 @@ def load_mc1_data():
         if not neo4j_manager:
             return jsonify({'error': 'Neo4j not configured'}), 500
         
+        mode = request.args.get('mode', 'full')
+        if mode not in ('full', 'delta'):
+            return jsonify({'error': "mode must be 'full' or 'delta'"}), 400
+
         # Load MC1 data into Neo4j
-        result = neo4j_manager.load_mc1_data_default()
+        result = neo4j_manager.load_mc1_data_default(mode=mode)
         return jsonify(result)
         
     except Exception as e:
@@ -131,6 +134,81 @@ def search_neo4j_entities():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def list_arg(name):
+    """Values of a repeatable or comma-separated query parameter"""
+    return [value for arg in request.args.getlist(name) for value in arg.split(',') if value]
+
+@neo4j_bp.route('/neo4j/neighborhood', methods=['GET'])
+def get_neighborhood():
+    """Expand a node's k-hop neighborhood for click-to-expand in the network view"""
+    try:
+        neo4j_manager = get_neo4j_manager()
+        if not neo4j_manager:
+            return jsonify({'error': 'Neo4j not configured'}), 500
+        
+        node_id = request.args.get('id', '')
+        if not node_id:
+            return jsonify({'error': 'Query parameter id required'}), 400
+        
+        result = neo4j_manager.get_neighborhood(
+            node_id,
+            hops=request.args.get('hops', 1, type=int),
+            labels=list_arg('labels'),
+            rel_types=list_arg('types'),
+            fanout=request.args.get('fanout', 50, type=int),
+            max_nodes=request.args.get('max_nodes', type=int)
+        )
+        if result is None:
+            return jsonify({'error': f'Node not found: {node_id}'}), 404
+        return jsonify(dict(result, seed=node_id))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@neo4j_bp.route('/neo4j/time-window', methods=['GET'])
+def get_time_window():
+    """Links dated within from..to, earliest first, for the temporal views"""
+    try:
+        neo4j_manager = get_neo4j_manager()
+        if not neo4j_manager:
+            return jsonify({'error': 'Neo4j not configured'}), 500
+        
+        try:
+            result = neo4j_manager.get_time_window(
+                start=request.args.get('from'),
+                end=request.args.get('to'),
+                limit=request.args.get('limit', 500, type=int),
+                rel_types=list_arg('types')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@neo4j_bp.route('/neo4j/temporal-aggregate', methods=['GET'])
+def get_temporal_aggregate():
+    """Link counts per time bucket and relationship type within from..to"""
+    try:
+        neo4j_manager = get_neo4j_manager()
+        if not neo4j_manager:
+            return jsonify({'error': 'Neo4j not configured'}), 500
+        
+        try:
+            result = neo4j_manager.get_temporal_aggregate(
+                start=request.args.get('from'),
+                end=request.args.get('to'),
+                bucket=request.args.get('bucket', 'month'),
+                rel_types=list_arg('types')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Legacy routes for backward compatibility
 @neo4j_bp.route('/neo4j-data', methods=['GET'])
 def get_neo4j_data():
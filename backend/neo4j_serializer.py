@@ -0,0 +1,205 @@
+"""
+JSON serialization of Neo4j query results.
+
+Handlers are picked by type through a per-class cache (relationship classes
+are generated per type by the driver, so the MRO is walked once per class
+rather than probed per value). Nodes and relationships are serialized once per
+result and memoized by element id, however many rows or paths repeat them.
+
+Two shapes are produced:
+
+* ``records`` - the legacy payload: every row embeds full node, relationship
+  and path objects (memoized dicts are shared, not rebuilt). Streams call
+  ``forget`` per chunk so the memo stays bounded by the chunk size.
+* ``graph`` - a deduplicated payload: rows hold ``{'$node': id}``,
+  ``{'$relationship': id}`` and ``{'$path': {...}}`` references into the
+  top-level ``nodes`` / ``relationships`` maps keyed by element id. When
+  streaming, ``drain`` hands out each entity once, before the first row that
+  references it; after each chunk ``forget`` keeps only the ids already sent.
+
+Entity properties never include the internal delta-load fingerprint.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from mc1_model import FINGERPRINT
+
+try:
+    from neo4j.graph import Node, Path, Relationship
+    from neo4j.spatial import Point
+    from neo4j.time import Date, DateTime, Duration, Time
+    NEO4J_TYPES = (Node, Relationship, Path, Point, Date, DateTime, Duration, Time)
+except ImportError:
+    Node = Relationship = Path = Point = Date = DateTime = Duration = Time = None
+    NEO4J_TYPES = ()
+
+FORMATS = ('records', 'graph')
+
+
+class GraphSerializer:
+    """Serializes the values of one result; create a new instance per query"""
+
+    def __init__(self, dedup=False):
+        self.dedup = dedup
+        self.nodes = {}
+        self.relationships = {}
+        self._sent_nodes = set()
+        self._sent_relationships = set()
+        self._new_nodes = []
+        self._new_relationships = []
+        self._handlers = {}
+        self._dispatch = [
+            (bool, _scalar), (int, _scalar), (float, _scalar), (str, _scalar),
+            (list, self._list), (tuple, self._list), (dict, self._dict),
+            (datetime, _isoformat), (date, _isoformat), (time, _isoformat), (timedelta, _timedelta),
+            (bytes, _bytes),
+        ]
+        if NEO4J_TYPES:
+            self._dispatch[:0] = [
+                (Node, self._node_value), (Relationship, self._relationship_value), (Path, self._path),
+                (Point, _point), (Date, _iso_format), (DateTime, _iso_format),
+                (Time, _iso_format), (Duration, _iso_format),
+            ]
+
+    def serialize(self, value):
+        if value is None:
+            return None
+        cls = type(value)
+        handler = self._handlers.get(cls)
+        if handler is None:
+            handler = self._resolve(cls)
+        return handler(value)
+
+    def _resolve(self, cls):
+        handler = str
+        for base, candidate in self._dispatch:
+            if issubclass(cls, base):
+                handler = candidate
+                break
+        self._handlers[cls] = handler
+        return handler
+
+    def record(self, record, keys):
+        return {key: self.serialize(record[key]) for key in keys}
+
+    def payload(self, rows):
+        """Top-level response body for serialized ``rows``"""
+        if not self.dedup:
+            return {'records': rows}
+        return {'records': rows, 'nodes': self.nodes, 'relationships': self.relationships}
+
+    def forget(self):
+        """Drop memoized entities once their chunk was written; ``graph`` format keeps their ids"""
+        if self.dedup:
+            self._sent_nodes.update(self.nodes)
+            self._sent_relationships.update(self.relationships)
+        self.nodes.clear()
+        self.relationships.clear()
+
+    def drain(self):
+        """Nodes and relationships first seen since the previous call, for streaming"""
+        nodes, relationships = self._new_nodes, self._new_relationships
+        self._new_nodes, self._new_relationships = [], []
+        return nodes, relationships
+
+    def _list(self, value):
+        serialize = self.serialize
+        return [serialize(v) for v in value]
+
+    def _dict(self, value):
+        serialize = self.serialize
+        return {k: serialize(v) for k, v in value.items()}
+
+    def _properties(self, entity):
+        serialize = self.serialize
+        return {k: serialize(v) for k, v in entity.items() if k != FINGERPRINT}
+
+    def node(self, node):
+        """Memoized ``{'identity', 'labels', 'properties'}`` dict for a node"""
+        element_id = node.element_id
+        serialized = self.nodes.get(element_id)
+        if serialized is None:
+            if element_id in self._sent_nodes:
+                # Streamed in an earlier chunk; dedup rows only need the id
+                return {'identity': element_id}
+            serialized = {
+                'identity': element_id,
+                'labels': list(node.labels),
+                'properties': self._properties(node),
+            }
+            self.nodes[element_id] = serialized
+            if self.dedup:
+                self._new_nodes.append(serialized)
+        return serialized
+
+    def relationship(self, rel):
+        """Memoized ``{'identity', 'type', 'properties', 'start_node', 'end_node'}`` dict"""
+        element_id = rel.element_id
+        serialized = self.relationships.get(element_id)
+        if serialized is None:
+            if element_id in self._sent_relationships:
+                return {'identity': element_id}
+            start_node, end_node = rel.start_node, rel.end_node
+            serialized = {
+                'identity': element_id,
+                'type': rel.type,
+                'properties': self._properties(rel),
+                'start_node': start_node.element_id if start_node is not None else None,
+                'end_node': end_node.element_id if end_node is not None else None,
+            }
+            self.relationships[element_id] = serialized
+            if self.dedup:
+                self._new_relationships.append(serialized)
+        return serialized
+
+    def _node_value(self, node):
+        serialized = self.node(node)
+        return {'$node': serialized['identity']} if self.dedup else serialized
+
+    def _relationship_value(self, rel):
+        serialized = self.relationship(rel)
+        return {'$relationship': serialized['identity']} if self.dedup else serialized
+
+    def _path(self, path):
+        nodes = [self.node(n) for n in path.nodes]
+        relationships = [self.relationship(r) for r in path.relationships]
+        if self.dedup:
+            return {'$path': {
+                'nodes': [n['identity'] for n in nodes],
+                'relationships': [r['identity'] for r in relationships],
+            }}
+        return {
+            'segments': [
+                {'start': nodes[i], 'end': nodes[i + 1], 'relationship': rel}
+                for i, rel in enumerate(relationships)
+            ],
+            'nodes': nodes,
+            'relationships': relationships,
+        }
+
+
+def _scalar(value):
+    return value
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _iso_format(value):
+    return value.iso_format()
+
+
+def _timedelta(value):
+    return value.total_seconds()
+
+
+def _bytes(value):
+    return value.hex()
+
+
+def _point(value):
+    point = {'srid': value.srid, 'x': value.x, 'y': value.y}
+    if len(value) > 2:
+        point['z'] = value.z
+    return point
@@ -0,0 +1,95 @@
+"""
+Byte-bounded LRU cache for custom Cypher query results.
+
+Keys are built from the normalized query text (whitespace collapsed outside
+string literals and quoted identifiers), the parameters and the result
+format, so cosmetic differences in generated queries still hit. Entries are
+tagged with the graph version they were read at; the owner clears the cache
+whenever the graph changes. An optional TTL bounds how long an entry can
+outlive a change made through another process.
+"""
+
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+
+_LITERALS = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`)""")
+_WHITESPACE = re.compile(r'\s+')
+# Functions whose result differs between runs of the same query
+_NON_DETERMINISTIC = re.compile(
+    r'\b(rand|randomUUID|timestamp|datetime|localdatetime|date|time|localtime)\s*\(', re.IGNORECASE
+)
+
+
+def normalize_query(query):
+    """Collapse whitespace outside literals and drop a trailing semicolon"""
+    parts = _LITERALS.split(query.strip())
+    for i in range(0, len(parts), 2):
+        parts[i] = _WHITESPACE.sub(' ', parts[i])
+    return ''.join(parts).strip().rstrip(';').strip()
+
+
+def is_deterministic(query):
+    """False when the query calls a random or clock function outside literals"""
+    parts = _LITERALS.split(query)
+    return not any(_NON_DETERMINISTIC.search(parts[i]) for i in range(0, len(parts), 2))
+
+
+def cache_key(query, params=None, format='records'):
+    return (normalize_query(query), json.dumps(params or {}, sort_keys=True, default=str), format)
+
+
+class QueryCache:
+    """Thread-safe LRU mapping of cache keys to results, bounded by total size in bytes"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version or (entry[3] is not None and entry[3] <= time.time()):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value, size):
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[2]
+            expires = time.time() + self.ttl if self.ttl else None
+            self._entries[key] = (version, value, size, expires)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, _, evicted, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
@@ -1,17 +1,52 @@
 import os
 import json
+import time
 from datetime import datetime
 
-from flask import jsonify, request
+import numpy as np
+from flask import Response, jsonify, request, stream_with_context
+
+from diversity import shannon_entropy
+from neo4j_manager import SAMPLING_MODES
 
 def register_routes(app, bias_analyzer, db_manager, neo4j_manager):
     @app.route('/', methods=['GET'])
     def root():
         return jsonify({'message': 'Veda Analytics API is running', 'status': 'ok'})
 
+    ingest_jobs = app.ingest_jobs
+
+    def start_ingest_job():
+        options = request.get_json(silent=True) or {}
+        return ingest_jobs.start(
+            app.config['ARTICLES_FOLDER'],
+            workers=options.get('workers', app.config['INGEST_WORKERS']),
+            chunk_size=options.get('chunk_size', app.config['INGEST_CHUNK_SIZE']),
+            batch_size=app.config['INGEST_BATCH_SIZE']
+        )
+
+    def job_links(job):
+        return {
+            'job_id': job.id,
+            'status_url': f'/api/ingest/jobs/{job.id}',
+            'events_url': f'/api/ingest/jobs/{job.id}/events',
+            'cancel_url': f'/api/ingest/jobs/{job.id}/cancel'
+        }
+
     @app.route('/api/processing-status', methods=['GET'])
     def get_processing_status():
         try:
+            # While an ingest runs, answer from its in-memory counters
+            job = ingest_jobs.active()
+            if job is not None:
+                snapshot = job.snapshot()
+                return jsonify({
+                    'articles_processed': snapshot['processed'] + snapshot['unchanged'],
+                    'total_files': snapshot['total_files'],
+                    'processing_complete': False,
+                    'progress_percentage': snapshot['progress_percentage'],
+                    'job': snapshot
+                })
             article_count = db_manager.get_article_count()
             articles_folder = app.config['ARTICLES_FOLDER']
             if os.path.exists(articles_folder):
@@ -37,107 +72,129 @@ def register_routes(app, bias_analyzer, db_manager, neo4j_manager):
             articles_folder = app.config['ARTICLES_FOLDER']
             if not os.path.exists(articles_folder):
                 return jsonify({'error': f'Articles folder not found: {articles_folder}'}), 404
-            all_files = os.listdir(articles_folder)
-            txt_files = [f for f in all_files if f.endswith('.txt') and f != 'README.md']
-            if not txt_files:
-                return jsonify({'error': 'No .txt files found in articles folder', 'folder': articles_folder, 'files_found': all_files[:10]}), 400
-            processed_count = 0
-            results = []
-            batch_size = 10
-            existing_articles = db_manager.get_articles()
-            existing_filenames = set(existing_articles['filename'].values) if not existing_articles.empty else set()
-            new_files = [f for f in txt_files if f not in existing_filenames]
-            for i in range(0, len(new_files), batch_size):
-                batch_files = new_files[i:i + batch_size]
-                for filename in batch_files:
-                    try:
-                        filepath = os.path.join(articles_folder, filename)
-                        with open(filepath, 'r', encoding='utf-8', errors='ignore') as file:
-                            content = file.read().strip()
-                        if not content or len(content) < 10:
-                            continue
-                        if len(content) > 50000:
-                            content = content[:50000] + "... [truncated]"
-                        sentiment = bias_analyzer.analyze_sentiment(content)
-                        entities = bias_analyzer.extract_entities(content)[:20]
-                        db_manager.insert_article(filename, content, sentiment, entities)
-                        if len(results) < 20:
-                            results.append({'filename': filename, 'sentiment': sentiment, 'entities': entities[:5], 'word_count': len(content.split())})
-                        processed_count += 1
-                    except Exception:
-                        continue
-            return jsonify({'message': f'Successfully processed {processed_count} articles', 'processed_count': processed_count, 'total_files': len(txt_files), 'results': results[:10]})
+            job, _ = start_ingest_job()
+            if request.args.get('background', 'false').lower() == 'true':
+                return jsonify({'message': 'Ingestion started', **job_links(job)}), 202
+            job.wait()
+            snapshot = job.snapshot()
+            if snapshot['state'] == 'failed':
+                return jsonify({'error': snapshot['error'], 'folder': articles_folder, 'job_id': job.id}), 400
+            processed_count = snapshot['processed']
+            return jsonify({
+                'message': snapshot['error'] or f'Successfully processed {processed_count} articles',
+                'state': snapshot['state'],
+                'processed_count': processed_count,
+                'unchanged_count': snapshot['unchanged'],
+                'purged_count': snapshot['purged'],
+                'failed_count': snapshot['failed'],
+                'write_error_count': snapshot['write_errors'],
+                'total_files': snapshot['total_files'],
+                'job_id': job.id,
+                'results': snapshot['samples']
+            })
         except Exception as e:
             return jsonify({'error': f'Failed to process articles: {str(e)}'}), 500
 
+    @app.route('/api/ingest/jobs', methods=['POST'])
+    def create_ingest_job():
+        try:
+            articles_folder = app.config['ARTICLES_FOLDER']
+            if not os.path.exists(articles_folder):
+                return jsonify({'error': f'Articles folder not found: {articles_folder}'}), 404
+            job, created = start_ingest_job()
+            if not created:
+                return jsonify({'error': 'An ingest job is already running', **job_links(job)}), 409
+            return jsonify({'message': 'Ingestion started', **job_links(job)}), 202
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/ingest/jobs/<job_id>', methods=['GET'])
+    def get_ingest_job(job_id):
+        job = ingest_jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        return jsonify(job.snapshot())
+
+    @app.route('/api/ingest/jobs/<job_id>/cancel', methods=['POST'])
+    def cancel_ingest_job(job_id):
+        job = ingest_jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+        if not job.finished_state:
+            job.cancel()
+        return jsonify({'message': 'Cancellation requested', **job.snapshot()}), 202
+
+    @app.route('/api/ingest/jobs/<job_id>/events', methods=['GET'])
+    def stream_ingest_job(job_id):
+        job = ingest_jobs.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+
+        def events():
+            version = None
+            while True:
+                snapshot = job.wait_for_update(version, timeout=15)
+                if snapshot is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                version = snapshot['version']
+                yield f"event: progress\ndata: {json.dumps(snapshot)}\n\n"
+                if snapshot['state'] in job.FINISHED_STATES:
+                    return
+                # Coalesce bursts of per-file updates into a few events per second
+                time.sleep(0.25)
+
+        return Response(stream_with_context(events()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
     @app.route('/api/sentiment-analysis', methods=['GET'])
     def get_sentiment_analysis():
         try:
-            articles_df = db_manager.get_articles()
-            if articles_df.empty:
+            if db_manager.get_article_count() == 0:
                 return jsonify({'message': 'No articles found. Please process articles first.'})
-            sentiment_data = []
-            for _, article in articles_df.iterrows():
-                entities = json.loads(article['entities']) if article['entities'] else []
-                for entity in entities:
-                    sentiment_data.append({'entity': entity, 'sentiment': article['sentiment'], 'filename': article['filename']})
-            import pandas as pd
-            sentiment_df = pd.DataFrame(sentiment_data)
-            if not sentiment_df.empty:
-                sentiment_summary = sentiment_df.groupby(['entity', 'sentiment']).size().unstack(fill_value=0)
-                sentiment_summary['total'] = sentiment_summary.sum(axis=1)
-                sentiment_summary['positive_ratio'] = sentiment_summary.get('positive', 0) / sentiment_summary['total']
-                sentiment_summary['negative_ratio'] = sentiment_summary.get('negative', 0) / sentiment_summary['total']
-                result = []
-                for entity in sentiment_summary.index:
-                    result.append({
-                        'entity': entity,
-                        'positive': int(sentiment_summary.loc[entity, 'positive']) if 'positive' in sentiment_summary.columns else 0,
-                        'negative': int(sentiment_summary.loc[entity, 'negative']) if 'negative' in sentiment_summary.columns else 0,
-                        'neutral': int(sentiment_summary.loc[entity, 'neutral']) if 'neutral' in sentiment_summary.columns else 0,
-                        'total': int(sentiment_summary.loc[entity, 'total']),
-                        'positive_ratio': float(sentiment_summary.loc[entity, 'positive_ratio']),
-                        'negative_ratio': float(sentiment_summary.loc[entity, 'negative_ratio'])
-                    })
-                return jsonify(result)
-            else:
-                return jsonify([])
+            result = []
+            for entity, positive, negative, neutral, total in db_manager.get_entity_sentiment_counts():
+                result.append({
+                    'entity': entity,
+                    'positive': int(positive),
+                    'negative': int(negative),
+                    'neutral': int(neutral),
+                    'total': int(total),
+                    'positive_ratio': positive / total,
+                    'negative_ratio': negative / total
+                })
+            return jsonify(result)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
     @app.route('/api/entropy-analysis', methods=['GET'])
     def get_entropy_analysis():
         try:
-            articles_df = db_manager.get_articles()
-            if articles_df.empty:
+            if db_manager.get_article_count() == 0:
                 return jsonify({'message': 'No articles found'})
-            entropy_data = []
-            for _, article in articles_df.iterrows():
-                entities = json.loads(article['entities']) if article['entities'] else []
-                for entity in entities:
-                    entropy_data.append({'entity': entity, 'sentiment': article['sentiment'], 'filename': article['filename']})
-            import pandas as pd
-            if entropy_data:
-                entropy_df = pd.DataFrame(entropy_data)
-                result = []
-                for entity in entropy_df['entity'].unique():
-                    entity_data = entropy_df[entropy_df['entity'] == entity]
-                    sentiments = entity_data['sentiment'].tolist()
-                    entropy_score = bias_analyzer.calculate_entropy(sentiments)
-                    result.append({'entity': entity, 'entropy': float(entropy_score), 'article_count': len(entity_data), 'sentiment_distribution': entity_data['sentiment'].value_counts().to_dict()})
-                result.sort(key=lambda x: x['entropy'])
-                return jsonify(result)
-            else:
-                return jsonify([])
+            # One vectorized pass over the entity x sentiment count matrix
+            entities, counts = db_manager.get_entity_sentiment_matrix()
+            totals = counts.sum(axis=1)
+            entropies = shannon_entropy(counts)
+            distributions = db_manager.sentiment_distributions(counts)
+            result = []
+            for i in np.argsort(entropies, kind='stable').tolist():
+                result.append({'entity': entities[i], 'entropy': float(entropies[i]), 'article_count': int(totals[i]), 'sentiment_distribution': distributions[i]})
+            return jsonify(result)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
     @app.route('/api/network-data', methods=['GET'])
     def get_network_data():
         try:
-            if neo4j_manager and neo4j_manager.driver:
+            # Without a Neo4j connection the manager serves the in-process graph engine
+            if neo4j_manager:
                 limit = request.args.get('limit', 200, type=int)
-                subgraph = neo4j_manager.get_subgraph(limit)
+                # The overview defaults to a label-stratified sample so small entity types still show up
+                mode = request.args.get('mode', 'label')
+                if mode not in SAMPLING_MODES:
+                    return jsonify({'error': f"mode must be one of {', '.join(SAMPLING_MODES)}"}), 400
+                subgraph = neo4j_manager.get_subgraph(limit, mode=mode, seed=request.args.get('seed', 0, type=int))
                 if subgraph['nodes']:
                     nodes = []
                     for node in subgraph['nodes']:
@@ -153,7 +210,7 @@ def register_routes(app, bias_analyzer, db_manager, neo4j_manager):
                             'date_added': link.get('date_added'),
                             'last_edited_by': link.get('last_edited_by')
                         })
-                    return jsonify({'nodes': nodes, 'edges': edges, 'source': 'neo4j'})
+                    return jsonify({'nodes': nodes, 'edges': edges, 'source': 'neo4j' if neo4j_manager.online else 'engine'})
             sample_nodes = [
                 {'id': 'SouthSeafood Express Corp', 'type': 'Company', 'group': 1},
                 {'id': 'FishEye International', 'type': 'NGO', 'group': 2},
@@ -178,10 +235,13 @@ def register_routes(app, bias_analyzer, db_manager, neo4j_manager):
             mc1_path = app.config['MC1_JSON_PATH']
             if not os.path.exists(mc1_path):
                 return jsonify({'error': f'MC1 file not found: {mc1_path}'}), 404
-            success = neo4j_manager.load_mc1_data(mc1_path)
-            if success:
+            mode = request.args.get('mode', 'full')
+            if mode not in ('full', 'delta'):
+                return jsonify({'error': "mode must be 'full' or 'delta'"}), 400
+            load = neo4j_manager.load_mc1_data(mc1_path, mode=mode)
+            if load:
                 stats = neo4j_manager.get_graph_stats()
-                return jsonify({'message': 'MC1 data loaded successfully', 'stats': stats})
+                return jsonify({'message': 'MC1 data loaded successfully', 'stats': stats, 'load': load})
             else:
                 return jsonify({'error': 'Failed to load MC1 data'}), 500
         except Exception as e:
@@ -203,7 +263,10 @@ def register_routes(app, bias_analyzer, db_manager, neo4j_manager):
             if not neo4j_manager:
                 return jsonify({'error': 'Neo4j not available'}), 503
             limit = request.args.get('limit', 100, type=int)
-            subgraph = neo4j_manager.get_subgraph(limit)
+            mode = request.args.get('mode', 'first')
+            if mode not in SAMPLING_MODES:
+                return jsonify({'error': f"mode must be one of {', '.join(SAMPLING_MODES)}"}), 400
+            subgraph = neo4j_manager.get_subgraph(limit, mode=mode, seed=request.args.get('seed', 0, type=int))
             return jsonify(subgraph)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -225,9 +288,12 @@ def register_routes(app, bias_analyzer, db_manager, neo4j_manager):
     @app.route('/api/neo4j/status', methods=['GET'])
     def neo4j_status():
         try:
-            if not neo4j_manager or not neo4j_manager.driver:
+            if not neo4j_manager or not neo4j_manager.online:
                 return jsonify({'connected': False, 'message': 'Neo4j not available or not connected'})
             stats = neo4j_manager.get_graph_stats()
+            # A failed read can switch the manager to the in-process graph
+            if not stats or not neo4j_manager.online:
+                return jsonify({'connected': False, 'message': 'Neo4j connection error: could not read graph statistics'})
             return jsonify({'connected': True, 'message': 'Neo4j connected successfully', 'stats': stats})
         except Exception as e:
             return jsonify({'connected': False, 'message': f'Neo4j connection error: {str(e)}'})
@@ -251,43 +317,10 @@ def register_routes(app, bias_analyzer, db_manager, neo4j_manager):
     @app.route('/api/temporal-bias-analysis', methods=['GET'])
     def get_temporal_bias_analysis():
         try:
-            # Generate temporal bias data based on presentation slides
-            months = ['February', 'March', 'April', 'May', 'June', 'July']
-            event_types = [
-                'Fishing.SustainableFishing', 'Invest', 'Fishing', 'Transaction',
-                'CertificateIssued', 'Communication', 'Applaud', 'Aid',
-                'Communication.Conference', 'Criticize', 'Convicted',
-                'Fishing.OverFishing', 'CertificateIssued.Summons'
-            ]
-            
-            temporal_data = []
-            for event_type in event_types:
-                monthly_data = []
-                for month in months:
-                    # Simulate bias patterns based on presentation
-                    bias_score = 0.2 + (hash(event_type + month) % 80) / 100  # 0.2 to 1.0
-                    
-                    # Higher bias for certain events
-                    if event_type in ['Criticize', 'Convicted', 'Fishing.OverFishing']:
-                        bias_score = 0.4 + (hash(event_type + month) % 60) / 100
-                    
-                    # Lower bias for sustainable events
-                    if event_type in ['Fishing.SustainableFishing', 'Aid', 'Communication.Conference']:
-                        bias_score = 0.6 + (hash(event_type + month) % 40) / 100
-                    
-                    monthly_data.append({
-                        'month': month,
-                        'bias_score': round(bias_score, 3),
-                        'intensity': (hash(event_type + month) % 20) + 1
-                    })
-                
-                temporal_data.append({
-                    'event_type': event_type,
-                    'monthly_data': monthly_data,
-                    'avg_bias': round(sum(d['bias_score'] for d in monthly_data) / len(monthly_data), 3)
-                })
-            
-            return jsonify(temporal_data)
+            # Monthly bias per event type, computed once per MC1 file version
+            return jsonify(app.temporal_bias.get())
+        except FileNotFoundError:
+            return jsonify({'error': 'MC1 data file not found'}), 404
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,137 @@
+"""
+Temporal bias aggregation over MC1 links for ``/api/temporal-bias-analysis``.
+
+Links are bucketed by month (``_date_added``) and event type (the link
+``type``). For every bucket, the spread of its links over raw sources,
+extraction algorithms and analysts (``_last_edited_by``) is scored with the
+shared diversity metrics: a dimension's bias is ``1 - Pielou evenness``, as in
+the bias notebooks, and a bucket's ``bias_score`` is the mean over dimensions.
+Each dimension is one ``bincount`` into a (bucket x category) matrix scored in
+a single vectorized pass, reading the typed code columns of ``GraphEngine``.
+
+Results depend only on the MC1 file, so they are computed once per file
+version (size + mtime) and stored as JSON; every worker process serves the
+same stored numbers instead of recomputing them.
+"""
+
+import os
+import json
+import calendar
+import tempfile
+import threading
+
+import numpy as np
+
+from diversity import diversity_metrics
+from graph_engine import GraphEngine
+
+# Link columns whose concentration within a bucket counts as bias
+DIMENSIONS = ('raw_source', 'algorithm', 'last_edited_by')
+
+
+def event_name(link_type):
+    """Event type as shown in the temporal views (without the ``Event.`` prefix)"""
+    return link_type[len('Event.'):] if link_type.startswith('Event.') else link_type
+
+
+def distribution_bias(counts):
+    """1 - Pielou evenness per row; rows with fewer than two categories score 0"""
+    metrics = diversity_metrics(counts)
+    return np.where(metrics['richness'] > 1, 1.0 - metrics['evenness_pielou'], 0.0)
+
+
+def compute_temporal_bias(engine):
+    """Per event type, monthly bias scores and link counts for every month with dated links"""
+    type_codes = engine.link_columns['type'].codes
+    dated = ~np.isnat(engine.link_dates) & (type_codes >= 0)
+    months, month_codes = np.unique(engine.link_dates[dated].astype('datetime64[M]'), return_inverse=True)
+    type_values = engine.link_columns['type'].values
+    n_types, n_months = len(type_values), len(months)
+    bucket = type_codes[dated].astype(np.int64) * n_months + month_codes
+    n_buckets = n_types * n_months
+
+    intensity = np.bincount(bucket, minlength=n_buckets)
+    biases = []
+    for dimension in DIMENSIONS:
+        # Code -1 (missing value) becomes its own category 0
+        categories = engine.link_columns[dimension].codes[dated].astype(np.int64) + 1
+        n_categories = len(engine.link_columns[dimension].values) + 1
+        counts = np.bincount(bucket * n_categories + categories, minlength=n_buckets * n_categories)
+        biases.append(distribution_bias(counts.reshape(n_buckets, n_categories)))
+    bias_score = np.round(np.mean(biases, axis=0), 3).reshape(n_types, n_months)
+    intensity = intensity.reshape(n_types, n_months)
+
+    periods = np.datetime_as_string(months).tolist()
+    labels = [calendar.month_name[int(period[5:7])] for period in periods]
+    results = []
+    for t in sorted(range(n_types), key=lambda t: event_name(type_values[t])):
+        active = intensity[t] > 0
+        if not active.any():
+            continue
+        results.append({
+            'event_type': event_name(type_values[t]),
+            'monthly_data': [
+                {'month': label, 'period': period, 'bias_score': float(score), 'intensity': int(count)}
+                for label, period, score, count in zip(labels, periods, bias_score[t].tolist(), intensity[t].tolist())
+            ],
+            'avg_bias': round(float(bias_score[t][active].mean()), 3),
+            'total_links': int(intensity[t].sum()),
+        })
+    return results
+
+
+class TemporalBiasStore:
+    """Temporal bias results for one MC1 file, computed once per file version and persisted"""
+
+    def __init__(self, mc1_path, store_path, load_engine=None):
+        self.mc1_path = mc1_path
+        self.store_path = store_path
+        self.load_engine = load_engine
+        self._cached = None
+        self._lock = threading.Lock()
+
+    def _signature(self):
+        stat = os.stat(self.mc1_path)
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+    def get(self):
+        """Stored results, recomputed only when the MC1 file changed; raises FileNotFoundError"""
+        signature = self._signature()
+        cached = self._cached
+        if cached and cached[0] == signature:
+            return cached[1]
+        with self._lock:
+            cached = self._cached
+            if cached and cached[0] == signature:
+                return cached[1]
+            results = self._read(signature)
+            if results is None:
+                results = self._build(signature)
+            self._cached = (signature, results)
+            return results
+
+    def _read(self, signature):
+        try:
+            with open(self.store_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            return stored['results'] if stored.get('signature') == signature else None
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _build(self, signature):
+        # A shared engine (Neo4j offline) is reused; otherwise a temporary one is built and dropped
+        engine = self.load_engine() if self.load_engine is not None else None
+        if engine is None:
+            engine = GraphEngine.from_mc1(self.mc1_path)
+        results = compute_temporal_bias(engine)
+        try:
+            # Write-then-rename so concurrent workers never read a partial file
+            directory = os.path.dirname(self.store_path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'signature': signature, 'results': results}, f)
+            os.replace(tmp_path, self.store_path)
+        except OSError as e:
+            print(f"Could not store temporal bias results: {e}")
+        return results
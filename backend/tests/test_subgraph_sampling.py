@@ -0,0 +1,53 @@
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import neo4j_manager
+from neo4j_manager import Neo4jManager
+
+
+class RecordingDriver:
+    """Stands in for the Neo4j driver: records queries and returns no rows"""
+
+    def __init__(self):
+        self.calls = []
+
+    def execute_query(self, query, parameters_=None, **params):
+        self.calls.append((query, params))
+        return [], None, []
+
+
+def manager(monkeypatch):
+    monkeypatch.setattr(neo4j_manager, 'NEO4J_AVAILABLE', False)
+    manager = Neo4jManager('bolt://localhost:7687', 'neo4j', 'secret', query_cache_bytes=0)
+    manager.driver = RecordingDriver()
+    return manager
+
+
+def random_sample(manager, seed, limit=50, relationships=2000):
+    """Ids the emitted ORDER BY key would pick, evaluated over ids 0..relationships-1"""
+    manager.get_subgraph(limit, mode='random', seed=seed)
+    query, params = manager.driver.calls[-1]
+    key = re.search(r'ORDER BY (.+?) LIMIT \$limit', query).group(1)
+    key = key.replace('id(r)', 'rid').replace('$seed', 'seed')
+    assert max(eval(key, {'rid': rid, 'seed': params['seed']}) for rid in range(relationships)) < 2 ** 63
+    return set(sorted(range(relationships), key=lambda rid: eval(key, {'rid': rid, 'seed': params['seed']}))[:limit])
+
+
+def test_random_mode_differs_between_seeds(monkeypatch):
+    m = manager(monkeypatch)
+    first, second = random_sample(m, 1), random_sample(m, 2)
+    assert len(first & second) < len(first) // 2
+
+
+def test_random_mode_is_reproducible(monkeypatch):
+    m = manager(monkeypatch)
+    assert random_sample(m, 7) == random_sample(m, 7)
+
+
+def test_random_mode_keeps_large_seeds_in_range(monkeypatch):
+    m = manager(monkeypatch)
+    m.get_subgraph(10, mode='random', seed=2 ** 40 + 3)
+    assert 0 <= m.driver.calls[-1][1]['seed'] < 2 ** 31
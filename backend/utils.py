@@ -5,14 +5,15 @@ Utility functions for the FishEye Watcher backend
 import os
 import json
 import logging
-import sqlite3
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-import pandas as pd
 import numpy as np
 from textblob import TextBlob
 import re
 
+from database import get_connection_manager
+from diversity import count_matrix, entropy_of, shannon_entropy
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -63,16 +64,7 @@ class DataProcessor:
     
     def calculate_entropy(self, values: List[str]) -> float:
         """Calculate information entropy for a list of values"""
-        if not values:
-            return 0.0
-        
-        # Count occurrences
-        value_counts = pd.Series(values).value_counts()
-        probabilities = value_counts / len(values)
-        
-        # Calculate entropy
-        entropy = -sum(probabilities * np.log2(probabilities))
-        return entropy
+        return entropy_of(values)
     
     def process_article(self, content: str, filename: str) -> Dict[str, Any]:
         """Process a single article and return analysis results"""
@@ -109,91 +101,83 @@ class BiasDetector:
     def __init__(self):
         self.data_processor = DataProcessor()
     
+    @staticmethod
+    def _entity_pairs(articles_data: List[Dict]):
+        """Flatten articles into parallel (entity, sentiment, filename) lists"""
+        entities, sentiments, filenames = [], [], []
+        for article in articles_data:
+            sentiment = article.get('sentiment', 'neutral')
+            filename = article.get('filename', 'unknown')
+            for entity in article.get('entities', []):
+                entities.append(entity)
+                sentiments.append(sentiment)
+                filenames.append(filename)
+        return entities, sentiments, filenames
+    
     def detect_sentiment_bias(self, articles_data: List[Dict]) -> List[Dict]:
         """Detect sentiment bias across entities"""
-        entity_sentiments = {}
+        entities, sentiments, _ = self._entity_pairs(articles_data)
+        if not entities:
+            return []
         
-        # Collect sentiment data for each entity
-        for article in articles_data:
-            entities = article.get('entities', [])
-            sentiment = article.get('sentiment', 'neutral')
-            
-            for entity in entities:
-                if entity not in entity_sentiments:
-                    entity_sentiments[entity] = []
-                entity_sentiments[entity].append(sentiment)
+        # One entity x sentiment count matrix, scored in a single pass
+        entity_labels, sentiment_labels, counts = count_matrix(entities, sentiments)
+        totals = counts.sum(axis=1)
+        entropies = shannon_entropy(counts)
+        column = {label: i for i, label in enumerate(sentiment_labels)}
+        
+        def sentiment_counts(label):
+            return counts[:, column[label]] if label in column else np.zeros(len(entity_labels), dtype=np.int64)
+        
+        positive, negative, neutral = (sentiment_counts(label) for label in ('positive', 'negative', 'neutral'))
         
-        # Calculate bias metrics for each entity
         bias_results = []
-        for entity, sentiments in entity_sentiments.items():
-            if len(sentiments) < 2:  # Need at least 2 articles for bias analysis
-                continue
-            
-            sentiment_counts = pd.Series(sentiments).value_counts()
-            total = len(sentiments)
-            
-            positive_ratio = sentiment_counts.get('positive', 0) / total
-            negative_ratio = sentiment_counts.get('negative', 0) / total
-            neutral_ratio = sentiment_counts.get('neutral', 0) / total
-            
-            # Calculate entropy (lower entropy = more bias)
-            entropy = self.data_processor.calculate_entropy(sentiments)
-            
+        for i in np.flatnonzero(totals >= 2):  # Need at least 2 articles for bias analysis
+            total = int(totals[i])
             bias_results.append({
-                'entity': entity,
+                'entity': entity_labels[i],
                 'total_articles': total,
-                'positive': sentiment_counts.get('positive', 0),
-                'negative': sentiment_counts.get('negative', 0),
-                'neutral': sentiment_counts.get('neutral', 0),
-                'positive_ratio': positive_ratio,
-                'negative_ratio': negative_ratio,
-                'neutral_ratio': neutral_ratio,
-                'entropy': entropy,
-                'bias_score': 1 - entropy  # Higher bias score = more biased
+                'positive': int(positive[i]),
+                'negative': int(negative[i]),
+                'neutral': int(neutral[i]),
+                'positive_ratio': positive[i] / total,
+                'negative_ratio': negative[i] / total,
+                'neutral_ratio': neutral[i] / total,
+                'entropy': float(entropies[i]),
+                'bias_score': 1 - float(entropies[i])  # Higher bias score = more biased
             })
         
         return bias_results
     
     def detect_entropy_bias(self, articles_data: List[Dict]) -> List[Dict]:
         """Detect bias using entropy analysis"""
-        entity_data = {}
+        entities, sentiments, filenames = self._entity_pairs(articles_data)
+        if not entities:
+            return []
+        sources = [filename.split('_')[0] if '_' in filename else 'unknown' for filename in filenames]
         
-        # Collect data for each entity
-        for article in articles_data:
-            entities = article.get('entities', [])
-            sentiment = article.get('sentiment', 'neutral')
-            filename = article.get('filename', 'unknown')
-            
-            for entity in entities:
-                if entity not in entity_data:
-                    entity_data[entity] = {
-                        'sentiments': [],
-                        'articles': [],
-                        'sources': []
-                    }
-                
-                entity_data[entity]['sentiments'].append(sentiment)
-                entity_data[entity]['articles'].append(filename)
-                entity_data[entity]['sources'].append(filename.split('_')[0] if '_' in filename else 'unknown')
+        # Both matrices share row order because they factorize the same entity sequence
+        entity_labels, sentiment_labels, sentiment_counts = count_matrix(entities, sentiments)
+        _, _, source_counts = count_matrix(entities, sources)
+        totals = sentiment_counts.sum(axis=1)
+        sentiment_entropy = shannon_entropy(sentiment_counts)
+        source_entropy = shannon_entropy(source_counts)
+        
+        articles = {}
+        for entity, filename in zip(entities, filenames):
+            articles.setdefault(entity, []).append(filename)
         
-        # Calculate entropy for each entity
         entropy_results = []
-        for entity, data in entity_data.items():
-            if len(data['sentiments']) < 2:
-                continue
-            
-            sentiment_entropy = self.data_processor.calculate_entropy(data['sentiments'])
-            source_entropy = self.data_processor.calculate_entropy(data['sources'])
-            
-            sentiment_distribution = pd.Series(data['sentiments']).value_counts().to_dict()
-            
+        for i in np.flatnonzero(totals >= 2):
+            row = sentiment_counts[i]
+            order = np.argsort(-row, kind='stable')
             entropy_results.append({
-                'entity': entity,
-                'article_count': len(data['articles']),
-                'entropy': sentiment_entropy,
-                'source_entropy': source_entropy,
-                'sentiment_distribution': sentiment_distribution,
-                'articles': data['articles'][:5]  # Show first 5 articles
+                'entity': entity_labels[i],
+                'article_count': int(totals[i]),
+                'entropy': float(sentiment_entropy[i]),
+                'source_entropy': float(source_entropy[i]),
+                'sentiment_distribution': {sentiment_labels[j]: int(row[j]) for j in order if row[j]},
+                'articles': articles[entity_labels[i]][:5]  # Show first 5 articles
             })
         
         return entropy_results
@@ -213,14 +197,15 @@ class DatabaseHelper:
     def execute_query(db_path: str, query: str, params: tuple = ()) -> List[Dict]:
         """Execute a query and return results as list of dictionaries"""
         try:
-            conn = sqlite3.connect(db_path)
-            conn.row_factory = DatabaseHelper.dict_factory
+            # Pooled per-thread connection; row factory is set on the cursor
+            # so other users of the shared connection keep plain tuples
+            conn = get_connection_manager(db_path).get()
             cursor = conn.cursor()
+            cursor.row_factory = DatabaseHelper.dict_factory
             
             cursor.execute(query, params)
             results = cursor.fetchall()
             
-            conn.close()
             return results
             
         except Exception as e:
@@ -230,8 +215,8 @@ class DatabaseHelper:
     @staticmethod
     def insert_data(db_path: str, table: str, data: Dict) -> bool:
         """Insert data into a table"""
+        conn = get_connection_manager(db_path).get()
         try:
-            conn = sqlite3.connect(db_path)
             cursor = conn.cursor()
             
             columns = ', '.join(data.keys())
@@ -240,12 +225,13 @@ class DatabaseHelper:
             
             cursor.execute(query, tuple(data.values()))
             conn.commit()
-            conn.close()
             
             return True
             
         except Exception as e:
             logger.error(f"Database insert error: {str(e)}")
+            # Release the write lock held by the pooled connection
+            conn.rollback()
             return False
 
 class FileHandler: